@@ -3,16 +3,97 @@ File Manager - Handles file operations for .lakra format files.
 """
 
 import os
+import errno
+import functools
 import json
-from typing import Tuple, Dict, Any, Optional
+import logging
+import mmap
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from stat import S_IMODE
+from typing import Tuple, Dict, Any, Callable, List, Optional, Union
 from metadata_manager import MetadataManager
 
+_log = logging.getLogger(__name__)
+
+# Delimiters around the metadata block of a .lakra file
+_META_START = b"<!-- GHOSTKEY_METADATA_START -->"
+_META_END = b"<!-- GHOSTKEY_METADATA_END -->"
+_META_START_LEN = len(_META_START)
+_META_START_STR = _META_START.decode('ascii')
+_META_END_STR = _META_END.decode('ascii')
+
+# Windows opens raw descriptors in text mode unless asked otherwise
+_O_BINARY = getattr(os, 'O_BINARY', 0)
+_READ_CHUNK_SIZE = 65536
+
+# .lakra files above this size are memory-mapped instead of read into memory
+_MMAP_THRESHOLD = 262144
+
+# Same block size coreutils' cp uses for its copy loop
+_COPY_BUFFER_SIZE = 131072
+_SENDFILE_CHUNK_SIZE = 1 << 27
+_HAS_SENDFILE = sys.platform.startswith('linux') and hasattr(os, 'sendfile')
+_HAS_FALLOCATE = hasattr(os, 'posix_fallocate')
+
+# mkstemp creates files as 0600; new saves get the usual umask-derived mode instead.
+# Where the umask can't be read without setting it, it is probed once under a lock.
+_umask_lock = threading.Lock()
+_probed_umask = None
+
+# How much of a file's end get_file_info inspects for the metadata marker
+_METADATA_TAIL_SIZE = 4096
+
+# How much of a file's end load_file probes before searching for metadata
+_METADATA_PROBE_SIZE = 128
+
+# How much of a file's end load_metadata_only reads looking for the metadata block
+_METADATA_ONLY_TAIL_SIZE = 65536
+
+# Upper bound on concurrent reads issued by load_many
+_LOAD_MANY_WORKERS = 16
+
+def _current_umask() -> int:
+    """Return the process umask, without changing it where the platform allows."""
+    try:
+        with open('/proc/self/status', 'rb') as status:
+            for line in status:
+                if line.startswith(b'Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    
+    global _probed_umask
+    with _umask_lock:
+        if _probed_umask is None:
+            # Reading the umask means setting it; a restrictive placeholder keeps
+            # files created by other threads meanwhile private rather than open
+            _probed_umask = os.umask(0o077)
+            os.umask(_probed_umask)
+        return _probed_umask
+
+@functools.lru_cache(maxsize=4096)
+def _has_metadata_cached(file_path: str, mtime_ns: int, size: int) -> bool:
+    """Check a file's tail for the metadata end marker.
+    
+    Metadata is always appended at the end, so only the tail is read. mtime_ns and
+    size are part of the cache key so that any change to the file misses the cache.
+    """
+    with open(file_path, 'rb') as file:
+        file.seek(max(0, size - _METADATA_TAIL_SIZE))
+        tail = file.read()
+    return _META_END in tail
+
+
 class FileManager:
     """Manages file operations for GhostKey files."""
     
-    def __init__(self):
-        self.metadata_manager = MetadataManager()
-        
+    # MetadataManager holds no per-file state, so every instance shares one
+    metadata_manager = MetadataManager()
+    
     def is_lakra_file(self, file_path: str) -> bool:
         """Check if a file is a .lakra format file."""
         return file_path.endswith('.lakra')
@@ -24,8 +105,9 @@ class FileManager:
         
         # Remove .lakra extension and get the previous extension
         base_path = file_path[:-6]  # Remove '.lakra'
-        if '.' in base_path:
-            return base_path.split('.')[-1].lower()
+        _, dot, extension = base_path.rpartition('.')
+        if dot:
+            return extension.lower()
         return 'txt'  # Default to txt if no base extension
     
     def suggest_lakra_filename(self, original_path: str) -> str:
@@ -37,139 +119,305 @@ class FileManager:
     def load_file(self, file_path: str) -> Tuple[str, Optional[Dict[str, Any]]]:
         """Load content and metadata from a file."""
         try:
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"File not found: {file_path}")
-            
-            with open(file_path, 'r', encoding='utf-8') as file:
-                file_content = file.read()
-            
             if self.is_lakra_file(file_path):
-                return self._parse_lakra_content(file_content)
+                return self._read_and_parse(file_path, self._parse_lakra_content_bytes, allow_mmap=True)
             else:
                 # Regular file, no metadata
-                return file_content, None
+                return self._read_and_parse(file_path, self._decode), None
+        
+        except Exception as e:
+            raise OSError(f"Failed to load file '{file_path}': {e}") from e
+    
+    def load_content_only(self, file_path: str) -> str:
+        """Load only the text content of a file, never parsing its metadata."""
+        try:
+            if self.is_lakra_file(file_path):
+                return self._read_and_parse(file_path, self._parse_lakra_text_only, allow_mmap=True)
+            return self._read_and_parse(file_path, self._decode)
+        
+        except Exception as e:
+            raise OSError(f"Failed to load file '{file_path}': {e}") from e
+    
+    def load_metadata_only(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Load only the metadata of a .lakra file by reading the end of the file."""
+        if not self.is_lakra_file(file_path):
+            return None
+        
+        try:
+            fd = os.open(file_path, os.O_RDONLY | _O_BINARY)
+            try:
+                size = os.fstat(fd).st_size
+                offset = max(0, size - _METADATA_ONLY_TAIL_SIZE)
+                os.lseek(fd, offset, os.SEEK_SET)
+                tail = self._read_fd(fd, size - offset)
+            finally:
+                os.close(fd)
+            
+            metadata_start_idx = self._find_metadata_start(tail)
+            if metadata_start_idx == -1:
+                if offset and _META_END in tail[-_METADATA_PROBE_SIZE:]:
+                    # The metadata block is bigger than the tail window
+                    return self.load_file(file_path)[1]
+                return None
+            
+            metadata_start_idx += _META_START_LEN
+            metadata_end_idx = tail.find(_META_END, metadata_start_idx)
+            if metadata_end_idx == -1:
+                return None
+            
+            return self.metadata_manager.deserialize_metadata(tail[metadata_start_idx:metadata_end_idx])
         
         except Exception as e:
-            raise Exception(f"Failed to load file '{file_path}': {str(e)}")
+            raise OSError(f"Failed to load metadata from '{file_path}': {e}") from e
+    
+    def _read_and_parse(self, file_path: str, parse: Callable[[Union[bytes, mmap.mmap]], Any],
+                        allow_mmap: bool = False) -> Any:
+        """Hand a file's bytes to parse, memory-mapping it when large and allowed."""
+        # Let os.open raise FileNotFoundError rather than stat-ing first
+        fd = os.open(file_path, os.O_RDONLY | _O_BINARY)
+        try:
+            size = os.fstat(fd).st_size
+            
+            if allow_mmap and size > _MMAP_THRESHOLD:
+                # Search the page cache directly; only the slices we keep get copied
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                    return parse(mapped)
+            
+            raw = self._read_fd(fd, size)
+        finally:
+            os.close(fd)
+        
+        return parse(raw)
+    
+    def load_many(self, paths: List[str]) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """Load several files concurrently, returning results in the order given."""
+        if len(paths) <= 1:
+            return [self.load_file(path) for path in paths]
+        
+        # The GIL is released around each blocking read, so a pool keeps several
+        # requests in flight and lets the device overlap them
+        with ThreadPoolExecutor(max_workers=min(_LOAD_MANY_WORKERS, len(paths))) as executor:
+            return list(executor.map(self.load_file, paths))
     
     def save_file(self, file_path: str, content: str, metadata: Optional[Dict[str, Any]] = None):
         """Save content and metadata to a file."""
         try:
             # Create directory if it doesn't exist
             directory = os.path.dirname(file_path)
-            if directory and not os.path.exists(directory):
-                os.makedirs(directory)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
             
             if self.is_lakra_file(file_path):
                 file_content = self._create_lakra_content(content, metadata)
             else:
                 file_content = content
             
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(file_content)
+            self._replace_file(file_path, file_content.encode('utf-8'))
         
         except Exception as e:
-            raise Exception(f"Failed to save file '{file_path}': {str(e)}")
+            raise OSError(f"Failed to save file '{file_path}': {e}") from e
     
-    def _parse_lakra_content(self, file_content: str) -> Tuple[str, Optional[Dict[str, Any]]]:
-        """Parse .lakra file content to extract text content and metadata."""
+    def _replace_file(self, file_path: str, data: bytes):
+        """Atomically replace a file: write a sibling temp file, then rename it over the target."""
+        # Follow symlinks so the link itself isn't replaced by a regular file
+        target_path = os.path.realpath(file_path)
         try:
-            # Look for metadata delimiter
-            metadata_start = "<!-- GHOSTKEY_METADATA_START -->"
-            metadata_end = "<!-- GHOSTKEY_METADATA_END -->"
+            mode = S_IMODE(os.stat(target_path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_current_umask()
+        
+        fd, temp_path = tempfile.mkstemp(
+            prefix="." + os.path.basename(target_path) + ".",
+            suffix=".tmp",
+            dir=os.path.dirname(target_path)
+        )
+        try:
+            try:
+                os.chmod(temp_path, mode)
+                
+                # Reserve the final size up front so the write doesn't grow the file piecemeal
+                if _HAS_FALLOCATE and data:
+                    try:
+                        os.posix_fallocate(fd, 0, len(data))
+                    except OSError:
+                        pass  # Not supported by this filesystem; the write still works
+                
+                self._write_fd(fd, data)
+            finally:
+                os.close(fd)
             
-            metadata_start_idx = file_content.find(metadata_start)
+            os.replace(temp_path, target_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    
+    def _read_fd(self, fd: int, size: int) -> bytes:
+        """Read a whole file from a raw descriptor, bypassing the buffered text layers."""
+        remaining = size
+        chunks = []
+        
+        # Read the reported size in as few calls as possible, then keep going
+        # in case the file grew since fstat
+        while True:
+            chunk = os.read(fd, max(remaining, _READ_CHUNK_SIZE))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+    
+    def _decode(self, raw: bytes) -> str:
+        """Decode UTF-8 bytes once, applying the same newline translation as text mode."""
+        text = raw.decode('utf-8')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+    
+    def _parse_lakra_content_bytes(self, raw: Union[bytes, mmap.mmap]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Parse raw .lakra bytes, decoding only the content and metadata slices.
+        
+        raw may also be an mmap; slicing it yields bytes, and raw[:] is a no-op for bytes.
+        """
+        try:
+            metadata_start_idx = self._find_metadata_start(raw)
             
             if metadata_start_idx == -1:
                 # No metadata found, return content as-is
-                return file_content, None
+                return self._decode(raw[:]), None
             
             # Extract content (everything before metadata)
-            content = file_content[:metadata_start_idx].rstrip()
+            content = self._decode(raw[:metadata_start_idx]).rstrip()
             
             # Find metadata end
-            metadata_start_idx += len(metadata_start)
-            metadata_end_idx = file_content.find(metadata_end, metadata_start_idx)
+            metadata_start_idx += _META_START_LEN
+            metadata_end_idx = raw.find(_META_END, metadata_start_idx)
             
             if metadata_end_idx == -1:
                 # Malformed metadata, return content without metadata
                 return content, None
             
-            # Extract metadata JSON
-            metadata_json = file_content[metadata_start_idx:metadata_end_idx].strip()
-            
-            # Parse metadata
-            metadata = self.metadata_manager.deserialize_metadata(metadata_json)
+            # Parse the metadata JSON straight from the byte slice
+            metadata = self.metadata_manager.deserialize_metadata(raw[metadata_start_idx:metadata_end_idx])
             
             return content, metadata
         
-        except Exception as e:
-            print(f"Error parsing lakra content: {e}")
+        except Exception:
+            _log.exception("Error parsing lakra content")
             # Return content without metadata on error
-            return file_content, None
+            return self._decode(raw[:]), None
+    
+    def _parse_lakra_text_only(self, raw: Union[bytes, mmap.mmap]) -> str:
+        """Decode the text content of raw .lakra bytes, skipping the metadata block."""
+        metadata_start_idx = self._find_metadata_start(raw)
+        if metadata_start_idx == -1:
+            return self._decode(raw[:])
+        return self._decode(raw[:metadata_start_idx]).rstrip()
+    
+    def _find_metadata_start(self, raw: Union[bytes, mmap.mmap]) -> int:
+        """Return the offset of the metadata start marker, or -1 if there is none."""
+        # A saved metadata block always ends the file; if the end marker isn't
+        # in the last few bytes, skip the full search entirely
+        if _META_END not in raw[-_METADATA_PROBE_SIZE:]:
+            return -1
+        
+        # Metadata is appended at the end, so search backwards for it
+        return raw.rfind(_META_START)
     
     def _create_lakra_content(self, content: str, metadata: Optional[Dict[str, Any]]) -> str:
         """Create .lakra file content with embedded metadata."""
         try:
-            # Start with the text content
-            lakra_content = content
-            
             # Add metadata if provided
             if metadata:
-                # Validate metadata
-                if self.metadata_manager.validate_metadata(metadata):
+                # Only the top-level shape is checked here; the ranges come from
+                # the tracker and anything unserializable is caught by the encoder
+                # in the same pass that produces the JSON
+                try:
+                    if not isinstance(metadata.get('ranges'), list):
+                        raise ValueError("metadata has no 'ranges' list")
                     metadata_json = self.metadata_manager.serialize_metadata(metadata)
-                    
-                    # Add metadata section
-                    lakra_content += "\n\n<!-- GHOSTKEY_METADATA_START -->\n"
-                    lakra_content += metadata_json
-                    lakra_content += "\n<!-- GHOSTKEY_METADATA_END -->"
-                else:
-                    print("Warning: Invalid metadata, saving without metadata")
+                except ValueError:
+                    _log.warning("Invalid metadata, saving without metadata", exc_info=True)
+                    return content
+                
+                # Build the text and metadata section in a single allocation
+                return ''.join((
+                    content, "\n\n", _META_START_STR, "\n",
+                    metadata_json, "\n", _META_END_STR
+                ))
             
-            return lakra_content
+            return content
         
-        except Exception as e:
-            print(f"Error creating lakra content: {e}")
+        except Exception:
+            _log.exception("Error creating lakra content")
             return content
     
     def export_metadata(self, file_path: str, metadata: Dict[str, Any]):
         """Export metadata to a separate .meta file."""
         try:
-            meta_file_path = file_path + ".meta"
             metadata_json = self.metadata_manager.serialize_metadata(metadata)
+            self._write_bytes(file_path + ".meta", metadata_json.encode('utf-8'))
+        
+        except Exception as e:
+            raise OSError(f"Failed to export metadata: {e}") from e
+    
+    def export_metadata_batch(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Export metadata for several files, serializing everything before writing."""
+        try:
+            # Serialize up front so a bad entry fails before any file is touched
+            payloads = [
+                (file_path + ".meta", self.metadata_manager.serialize_metadata(metadata).encode('utf-8'))
+                for file_path, metadata in items
+            ]
             
-            with open(meta_file_path, 'w', encoding='utf-8') as file:
-                file.write(metadata_json)
+            for meta_file_path, payload in payloads:
+                self._write_bytes(meta_file_path, payload)
         
         except Exception as e:
-            raise Exception(f"Failed to export metadata: {str(e)}")
+            raise OSError(f"Failed to export metadata: {e}") from e
+    
+    def _write_bytes(self, file_path: str, data: bytes):
+        """Write bytes to a file with one open/write/close on a raw descriptor."""
+        fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+        try:
+            self._write_fd(fd, data)
+        finally:
+            os.close(fd)
+    
+    def _write_fd(self, fd: int, data: bytes):
+        """Write all of data to a raw descriptor, retrying short writes."""
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
     
     def import_metadata(self, file_path: str) -> Optional[Dict[str, Any]]:
         """Import metadata from a separate .meta file."""
         try:
             meta_file_path = file_path + ".meta"
             
-            if not os.path.exists(meta_file_path):
+            try:
+                with open(meta_file_path, 'rb') as file:
+                    metadata_json = file.read()
+            except FileNotFoundError:
                 return None
             
-            with open(meta_file_path, 'r', encoding='utf-8') as file:
-                metadata_json = file.read()
-            
             return self.metadata_manager.deserialize_metadata(metadata_json)
         
-        except Exception as e:
-            print(f"Error importing metadata: {e}")
+        except Exception:
+            _log.exception("Error importing metadata")
             return None
     
     def get_file_info(self, file_path: str) -> Dict[str, Any]:
         """Get information about a file."""
         try:
-            if not os.path.exists(file_path):
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
                 return {"exists": False}
             
-            stat = os.stat(file_path)
-            
             info = {
                 "exists": True,
                 "size": stat.st_size,
@@ -178,40 +426,88 @@ class FileManager:
                 "has_metadata": False
             }
             
-            # Check for metadata
+            # Keyed on mtime and size, so an unchanged file is never re-read
             if info["is_lakra"]:
                 try:
-                    _, metadata = self.load_file(file_path)
-                    info["has_metadata"] = metadata is not None
-                except:
+                    info["has_metadata"] = _has_metadata_cached(file_path, stat.st_mtime_ns, stat.st_size)
+                except OSError:
                     pass
             
             return info
         
         except Exception as e:
-            print(f"Error getting file info: {e}")
+            _log.exception("Error getting file info")
             return {"exists": False, "error": str(e)}
     
+    def scan_directory_for_metadata(self, paths: List[str]) -> Dict[str, bool]:
+        """Report which of the given .lakra files carry a metadata block."""
+        results = {}
+        for file_path in paths:
+            if not self.is_lakra_file(file_path):
+                results[file_path] = False
+                continue
+            
+            # Only each file's tail is scanned, and unchanged files hit the cache
+            try:
+                stat = os.stat(file_path)
+                results[file_path] = _has_metadata_cached(file_path, stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                _log.debug("Cannot scan %s for metadata", file_path, exc_info=True)
+                results[file_path] = False
+        
+        return results
+    
     def backup_file(self, file_path: str) -> str:
         """Create a backup of a file."""
         try:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"File not found: {file_path}")
             
-            # Generate backup filename
-            backup_path = file_path + ".backup"
-            counter = 1
-            
-            while os.path.exists(backup_path):
-                backup_path = f"{file_path}.backup.{counter}"
-                counter += 1
-            
-            # Copy file
-            with open(file_path, 'rb') as src:
-                with open(backup_path, 'wb') as dst:
-                    dst.write(src.read())
+            src_fd = os.open(file_path, os.O_RDONLY | _O_BINARY)
+            try:
+                # Claim the backup name atomically; O_EXCL fails instead of
+                # overwriting a backup created since we last looked
+                backup_path = file_path + ".backup"
+                try:
+                    dst_fd = os.open(backup_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | _O_BINARY, 0o644)
+                except FileExistsError:
+                    # Let mkstemp pick a unique name in one call instead of probing a counter
+                    dst_fd, backup_path = tempfile.mkstemp(
+                        prefix=os.path.basename(file_path) + ".backup.",
+                        dir=os.path.dirname(file_path) or "."
+                    )
+                    try:
+                        # mkstemp creates 0600; match the primary path's mode
+                        os.chmod(backup_path, 0o644 & ~_current_umask())
+                    except OSError:
+                        os.close(dst_fd)
+                        raise
+                
+                try:
+                    self._copy_fd(src_fd, dst_fd)
+                finally:
+                    os.close(dst_fd)
+            finally:
+                os.close(src_fd)
             
             return backup_path
         
         except Exception as e:
-            raise Exception(f"Failed to backup file: {str(e)}")
+            raise OSError(f"Failed to backup file: {e}") from e
+    
+    def _copy_fd(self, src_fd: int, dst_fd: int):
+        """Stream one descriptor into another without holding the whole file in memory."""
+        if _HAS_SENDFILE:
+            try:
+                # The kernel copies straight from the page cache, no user-space buffer
+                while os.sendfile(dst_fd, src_fd, None, _SENDFILE_CHUNK_SIZE):
+                    pass
+                return
+            except OSError as e:
+                # Some filesystems refuse sendfile; fall back before anything was written
+                if e.errno not in (errno.EINVAL, errno.ENOSYS) or os.lseek(dst_fd, 0, os.SEEK_CUR):
+                    raise
+        
+        with open(src_fd, 'rb', buffering=0, closefd=False) as src, \
+                open(dst_fd, 'wb', buffering=0, closefd=False) as dst:
+            shutil.copyfileobj(src, dst, _COPY_BUFFER_SIZE)
@@ -1,25 +1,95 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, Menu
 import os
-import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from text_tracker import TextTracker
 from metadata_manager import MetadataManager
 from file_manager import FileManager
 from ui_components import StatusBar, HoverManager
 import time
 
+# How long typed characters are batched before being handed to the tracker
+_TYPING_FLUSH_DELAY_MS = 50
+
+# How often the Tk thread checks for finished background saves and exports
+_BACKGROUND_POLL_MS = 50
+
+# File type filters for the open and save dialogs
+_OPEN_FILETYPES = (
+    ("All Lakra files", "*.lakra"),
+    ("Lakra Text files", "*.txt.lakra"),
+    ("Lakra Markdown files", "*.md.lakra"),
+    ("Lakra Python files", "*.py.lakra"),
+    ("Lakra JavaScript files", "*.js.lakra"),
+    ("Regular Text files", "*.txt"),
+    ("Regular Markdown files", "*.md"),
+    ("All files", "*.*")
+)
+
+_SAVE_FILETYPES = (
+    ("Lakra Text files", "*.txt.lakra"),
+    ("Lakra Markdown files", "*.md.lakra"),
+    ("Lakra Python files", "*.py.lakra"),
+    ("Lakra JavaScript files", "*.js.lakra"),
+    ("Lakra HTML files", "*.html.lakra"),
+    ("Lakra CSS files", "*.css.lakra"),
+    ("Lakra JSON files", "*.json.lakra"),
+    ("All Lakra files", "*.lakra"),
+    ("All files", "*.*")
+)
+
+# Menu, toolbar and context menu layouts, naming entries of Application._command_table();
+# None marks a separator
+_MENU_LAYOUT = (
+    ("File", ("New", "Open", None, "Save", "Save As", None, "Exit")),
+    ("Edit", ("Undo", "Redo", None, "Cut", "Copy", "Paste", None, "Select All")),
+    ("View", ("Show Statistics", "Show Metadata Info")),
+    ("Tools", ("Export Analysis Report",)),
+)
+
+_TOOLBAR_LAYOUT = (
+    ("New", "New", 8),
+    ("Open", "Open", 8),
+    ("Save", "Save", 8),
+    None,
+    ("Statistics", "Show Statistics", 10),
+    ("Metadata", "Show Metadata Info", 10),
+    None,
+    ("Export Report", "Export Analysis Report", 12),
+)
+
+_CONTEXT_MENU_LAYOUT = ("Cut", "Copy", "Paste", None, "Select All")
+
 class Application:
     """Main application class for GhostKey text editor."""
     
     def __init__(self, root):
         self.root = root
         self.current_file = None
+        self._current_basename = None
         self.is_modified = False
         
+        # Typed characters waiting to be handed to the tracker as one run
+        self._pending_run_start = None
+        self._pending_chars = []
+        self._key_after_id = None
+        
+        # Composition totals shared by the statistics views, reset on every edit
+        self._stats_cache = None
+        
         # Initialize components
         self.text_tracker = TextTracker()
         self.metadata_manager = MetadataManager()
         self.file_manager = FileManager()
+        self._commands = self._command_table()
+        
+        # Saves and report exports run one at a time, in order, off the Tk
+        # thread, so exit_application can wait for all of them. Workers never
+        # touch Tk; the Tk thread polls for finished (future, on_done) jobs.
+        self._save_executor = ThreadPoolExecutor(max_workers=1)
+        self._background_jobs = []
+        self._background_poll_id = None
+        self._shutting_down = False
         
         # Setup UI
         self.setup_ui()
@@ -72,83 +142,73 @@ class Application:
         # Initialize text tracker with text widget
         self.text_tracker.set_text_widget(self.text_widget)
     
+    def _command_table(self):
+        """Commands shared by the menus, toolbar and keyboard shortcuts.
+        
+        Maps a name to (command, accelerator, key sequence, bind on text widget).
+        """
+        return {
+            "New": (self.new_file, "Ctrl+N", '<Control-n>', False),
+            "Open": (self.open_file, "Ctrl+O", '<Control-o>', False),
+            "Save": (self.save_file, "Ctrl+S", '<Control-s>', False),
+            "Save As": (self.save_as_file, "Ctrl+Shift+S", '<Control-S>', False),
+            "Exit": (self.exit_application, None, None, False),
+            "Undo": (self.undo, "Ctrl+Z", '<Control-z>', False),
+            "Redo": (self.redo, "Ctrl+Y", '<Control-y>', False),
+            "Cut": (self.cut, "Ctrl+X", '<Control-x>', True),
+            "Copy": (self.copy, "Ctrl+C", '<Control-c>', True),
+            "Paste": (self.paste, "Ctrl+V", '<Control-v>', True),
+            "Select All": (self.select_all, "Ctrl+A", '<Control-a>', False),
+            "Show Statistics": (self.show_statistics, None, None, False),
+            "Show Metadata Info": (self.show_metadata_info, None, None, False),
+            "Export Analysis Report": (self.export_analysis_report, None, None, False),
+        }
+    
+    def _fill_menu(self, menu, names, accelerators=True):
+        """Add the named commands to a menu, with separators for None."""
+        for name in names:
+            if name is None:
+                menu.add_separator()
+                continue
+            command, accelerator, _, _ = self._commands[name]
+            if accelerators and accelerator:
+                menu.add_command(label=name, command=command, accelerator=accelerator)
+            else:
+                menu.add_command(label=name, command=command)
+    
     def setup_toolbar(self, parent):
         """Setup the toolbar with quick access buttons."""
         toolbar = ttk.Frame(parent)
         toolbar.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
         
-        # File operations
-        ttk.Button(toolbar, text="New", command=self.new_file, width=8).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Open", command=self.open_file, width=8).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Save", command=self.save_file, width=8).pack(side=tk.LEFT, padx=2)
-        
-        # Separator
-        ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=5)
-        
-        # Statistics
-        ttk.Button(toolbar, text="Statistics", command=self.show_statistics, width=10).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Metadata", command=self.show_metadata_info, width=10).pack(side=tk.LEFT, padx=2)
-        
-        # Separator
-        ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=5)
-        
-        # Export options
-        ttk.Button(toolbar, text="Export Report", command=self.export_analysis_report, width=12).pack(side=tk.LEFT, padx=2)
+        for item in _TOOLBAR_LAYOUT:
+            if item is None:
+                ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=5)
+                continue
+            text, name, width = item
+            ttk.Button(toolbar, text=text, command=self._commands[name][0], width=width).pack(side=tk.LEFT, padx=2)
         
     def setup_menu(self):
         """Setup the application menu."""
         menubar = Menu(self.root)
         self.root.config(menu=menubar)
         
-        # File menu
-        file_menu = Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="File", menu=file_menu)
-        file_menu.add_command(label="New", command=self.new_file, accelerator="Ctrl+N")
-        file_menu.add_command(label="Open", command=self.open_file, accelerator="Ctrl+O")
-        file_menu.add_separator()
-        file_menu.add_command(label="Save", command=self.save_file, accelerator="Ctrl+S")
-        file_menu.add_command(label="Save As", command=self.save_as_file, accelerator="Ctrl+Shift+S")
-        file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.exit_application)
-        
-        # Edit menu
-        edit_menu = Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Edit", menu=edit_menu)
-        edit_menu.add_command(label="Undo", command=self.undo, accelerator="Ctrl+Z")
-        edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y")
-        edit_menu.add_separator()
-        edit_menu.add_command(label="Cut", command=self.cut, accelerator="Ctrl+X")
-        edit_menu.add_command(label="Copy", command=self.copy, accelerator="Ctrl+C")
-        edit_menu.add_command(label="Paste", command=self.paste, accelerator="Ctrl+V")
-        edit_menu.add_separator()
-        edit_menu.add_command(label="Select All", command=self.select_all, accelerator="Ctrl+A")
-        
-        # View menu
-        view_menu = Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="View", menu=view_menu)
-        view_menu.add_command(label="Show Statistics", command=self.show_statistics)
-        view_menu.add_command(label="Show Metadata Info", command=self.show_metadata_info)
-        
-        # Tools menu
-        tools_menu = Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Tools", menu=tools_menu)
-        tools_menu.add_command(label="Export Analysis Report", command=self.export_analysis_report)
+        for label, names in _MENU_LAYOUT:
+            menu = Menu(menubar, tearoff=0)
+            menubar.add_cascade(label=label, menu=menu)
+            self._fill_menu(menu, names)
+        
+        # Context menu, built once and reused for every right-click
+        self._context_menu = Menu(self.root, tearoff=0)
+        self._fill_menu(self._context_menu, _CONTEXT_MENU_LAYOUT, accelerators=False)
         
     def setup_bindings(self):
         """Setup keyboard and mouse bindings."""
-        # File operations
-        self.root.bind('<Control-n>', lambda e: self.new_file())
-        self.root.bind('<Control-o>', lambda e: self.open_file())
-        self.root.bind('<Control-s>', lambda e: self.save_file())
-        self.root.bind('<Control-S>', lambda e: self.save_as_file())
-        
-        # Edit operations
-        self.root.bind('<Control-z>', lambda e: self.undo())
-        self.root.bind('<Control-y>', lambda e: self.redo())
-        self.text_widget.bind('<Control-x>', lambda e: self.cut())
-        self.text_widget.bind('<Control-c>', lambda e: self.copy())
-        self.text_widget.bind('<Control-v>', self.on_paste)
-        self.root.bind('<Control-a>', lambda e: self.select_all())
+        # Shortcuts from the command table; clipboard keys go on the text widget
+        for command, _, sequence, on_text in self._commands.values():
+            if sequence:
+                widget = self.text_widget if on_text else self.root
+                widget.bind(sequence, lambda e, command=command: command())
         
         # Text modification tracking
         self.text_widget.bind('<KeyPress>', self.on_key_press)
@@ -170,53 +230,99 @@ class Application:
         
         # Track manual typing
         if event.char and event.char.isprintable():
-            def track_typing():
-                try:
-                    # Get current cursor position
-                    cursor_pos = self.text_widget.index(f"{tk.INSERT} -1c")
-                    # Schedule tracking after the character is inserted
-                    self.root.after(1, lambda: self.text_tracker.track_manual_input(cursor_pos, event.char))
-                except tk.TclError:
-                    pass  # Widget might be destroyed
-            
-            threading.Thread(target=track_typing, daemon=True).start()
-        
+            try:
+                # This runs before the character is inserted, so it will land at the
+                # cursor, or at the start of a selection that it replaces
+                cursor_pos = self.text_widget.index(tk.INSERT)
+                if self.text_widget.tag_ranges(tk.SEL) and \
+                        self.text_widget.compare(tk.SEL_FIRST, "<=", tk.INSERT) and \
+                        self.text_widget.compare(tk.SEL_LAST, ">=", tk.INSERT):
+                    self._flush_typing()
+                    cursor_pos = self.text_widget.index(tk.SEL_FIRST)
+                
+                # Start a new run unless this character continues the pending one
+                if self._pending_chars and cursor_pos != self.text_widget.index(
+                        f"{self._pending_run_start} + {len(self._pending_chars)}c"):
+                    self._flush_typing()
+                
+                if not self._pending_chars:
+                    self._pending_run_start = cursor_pos
+                self._pending_chars.append(event.char)
+                
+                # Coalesce a burst of keystrokes into one tracker update
+                if self._key_after_id is None:
+                    self._key_after_id = self.root.after(_TYPING_FLUSH_DELAY_MS, self._flush_typing)
+            except tk.TclError:
+                pass  # Widget might be destroyed
+        elif event.char and self._pending_chars:
+            # Editing keys (BackSpace, Return, ...) act right after this handler, so
+            # record the pending run while its offsets still match the text
+            self._flush_typing()
+    
+    def _flush_typing(self):
+        """Hand the pending run of typed characters to the tracker in one call."""
+        after_id, self._key_after_id = self._key_after_id, None
+        if after_id is not None:
+            self.root.after_cancel(after_id)
+        
+        if self._pending_chars:
+            run_start, chars = self._pending_run_start, ''.join(self._pending_chars)
+            self._pending_run_start = None
+            self._pending_chars = []
+            self.text_tracker.track_manual_input(run_start, chars)
+            self._invalidate_stats()
+    
+    def _discard_typing(self):
+        """Drop pending typed characters, e.g. when the whole buffer is replaced."""
+        if self._key_after_id is not None:
+            self.root.after_cancel(self._key_after_id)
+            self._key_after_id = None
+        self._pending_run_start = None
+        self._pending_chars = []
+    
+    def _invalidate_stats(self):
+        """Forget the cached composition totals after the text or its tracking changed."""
+        self._stats_cache = None
+    
+    def _compute_composition_summary(self):
+        """Return (total_chars, typed_chars, pasted_chars, typing_sessions, paste_operations).
+        
+        The totals are computed once and reused until the next edit.
+        """
+        if self._stats_cache is None:
+            total_chars = (self.text_widget.count("1.0", tk.END + "-1c", "chars") or (0,))[0]
+            typed_chars, pasted_chars, typing_sessions, paste_operations = \
+                self.text_tracker.get_composition_counts()
+            self._stats_cache = (total_chars, typed_chars, pasted_chars, typing_sessions, paste_operations)
+        return self._stats_cache
+    
     def on_mouse_click(self, event):
         """Handle mouse click events."""
         self.text_tracker.update_cursor_position()
         
     def on_right_click(self, event):
         """Handle right-click context menu."""
-        context_menu = None
         try:
-            # Create context menu
-            context_menu = Menu(self.root, tearoff=0)
-            context_menu.add_command(label="Cut", command=self.cut)
-            context_menu.add_command(label="Copy", command=self.copy)
-            context_menu.add_command(label="Paste", command=self.paste)
-            context_menu.add_separator()
-            context_menu.add_command(label="Select All", command=self.select_all)
-            
-            # Show context menu
-            context_menu.tk_popup(event.x_root, event.y_root)
+            self._context_menu.tk_popup(event.x_root, event.y_root)
         except Exception as e:
             print(f"Context menu error: {e}")
         finally:
-            if context_menu:
-                try:
-                    context_menu.destroy()
-                except:
-                    pass
+            self._context_menu.grab_release()
     
     def on_text_modified(self, event):
         """Handle text modification events."""
         if self.text_widget.edit_modified():
-            self.is_modified = True
-            self.update_title()
+            # Only the first change alters the title; later ones just re-arm the event
+            if not self.is_modified:
+                self.is_modified = True
+                self.update_title()
+            self._invalidate_stats()
+            self.text_tracker.invalidate_text_cache()
             self.text_widget.edit_modified(False)
     
     def on_paste(self, event):
         """Handle paste operations with tracking."""
+        self._flush_typing()
         try:
             # Get clipboard content
             clipboard_content = self.root.clipboard_get()
@@ -237,6 +343,7 @@ class Application:
                 
                 # Track the pasted content
                 self.text_tracker.track_paste_input(insert_pos, clipboard_content)
+                self._invalidate_stats()
                 
                 # Update status
                 self.status_bar.set_message(f"Pasted {len(clipboard_content)} characters")
@@ -254,10 +361,11 @@ class Application:
     
     def cut(self):
         """Cut selected text."""
+        self._flush_typing()
         try:
             self.text_widget.event_generate("<<Cut>>")
             self.status_bar.set_message("Text cut to clipboard")
-        except:
+        except tk.TclError:
             pass
     
     def copy(self):
@@ -265,48 +373,47 @@ class Application:
         try:
             self.text_widget.event_generate("<<Copy>>")
             self.status_bar.set_message("Text copied to clipboard")
-        except:
+        except tk.TclError:
             pass
     
     def undo(self):
         """Undo last action and refresh text tracker metadata."""
+        self._flush_typing()
+        self.last_saved_metadata = self.text_tracker.get_metadata()
         try:
-            self.last_saved_metadata = self.text_tracker.get_metadata()
             self.text_widget.edit_undo()
-            self.status_bar.set_message("Undo")
+        except tk.TclError:
+            return  # Nothing to undo
+        self.text_tracker.invalidate_text_cache()
+        self.status_bar.set_message("Undo")
 
-            # ✅ Refresh text tracker after undo
-            if hasattr(self, "text_tracker") and self.text_tracker:
-                self.text_tracker.refresh_after_undo()
-        except:
-            pass
+        # ✅ Refresh text tracker after undo
+        self.text_tracker.refresh_after_undo()
+        self._invalidate_stats()
 
     def redo(self):
+        self._flush_typing()
         try:
             self.text_widget.edit_redo()
+        except tk.TclError:
+            return  # Nothing to redo
+        self.text_tracker.invalidate_text_cache()
 
-            # Ask the tracker to restore metadata based on current text
-            if hasattr(self, "text_tracker"):
-                self.text_tracker.restore_from_current_text()
+        # Ask the tracker to restore metadata based on current text
+        dirty = self.text_tracker.restore_from_current_text()
+        self._invalidate_stats()
 
-            # Retag the whole text using restored metadata
-            self.retag_all_text()
+        # Retag the span whose metadata changed; unchanged ranges need no retag
+        if dirty:
+            self.retag_all_text(dirty)
 
-            self.status_bar.set_message("Redo")
-        except Exception as e:
-            print(f"[Redo Error] {e}")
+        self.status_bar.set_message("Redo")
 
 
         
-    def retag_all_text(self):
-        self.text_widget.tag_remove("typed", "1.0", "end")
-        self.text_widget.tag_remove("pasted", "1.0", "end")
-
-        for rng in self.text_tracker.input_ranges:
-            tag = "typed" if rng['source'] == 'manual' else 'pasted'
-            start = f"1.0 + {rng['start']}c"
-            end = f"1.0 + {rng['end']}c"
-            self.text_widget.tag_add(tag, start, end)
+    def retag_all_text(self, dirty=None):
+        """Re-apply the typed/pasted tags, only within the (start, end) span dirty if given."""
+        self.text_tracker.recolor_all("typed", "pasted", dirty)
 
 
 
@@ -324,13 +431,26 @@ class Application:
         if self.is_modified and not self.confirm_unsaved_changes():
             return
         
+        self._discard_typing()
         self.text_widget.delete("1.0", tk.END)
         self.text_tracker.clear()
-        self.current_file = None
+        self._mark_buffer_loaded()
+        self._set_current_file(None)
         self.is_modified = False
         self.update_title()
         self.status_bar.set_message("New file created")
     
+    def _mark_buffer_loaded(self):
+        """Reset change tracking after the whole buffer was replaced.
+        
+        <<Modified>> is queued rather than sent immediately, so clearing the flag
+        here turns the pending event into a no-op instead of marking the freshly
+        loaded text as modified; the caches it would have reset are dropped here.
+        """
+        self.text_widget.edit_modified(False)
+        self._invalidate_stats()
+        self.text_tracker.invalidate_text_cache()
+    
     def open_file(self):
         """Open an existing file."""
         if self.is_modified and not self.confirm_unsaved_changes():
@@ -338,16 +458,7 @@ class Application:
         
         file_path = filedialog.askopenfilename(
             title="Open File",
-            filetypes=[
-                ("All Lakra files", "*.lakra"),
-                ("Lakra Text files", "*.txt.lakra"),
-                ("Lakra Markdown files", "*.md.lakra"),
-                ("Lakra Python files", "*.py.lakra"),
-                ("Lakra JavaScript files", "*.js.lakra"),
-                ("Regular Text files", "*.txt"),
-                ("Regular Markdown files", "*.md"),
-                ("All files", "*.*")
-            ]
+            filetypes=_OPEN_FILETYPES
         )
         
         if file_path:
@@ -355,6 +466,7 @@ class Application:
                 content, metadata = self.file_manager.load_file(file_path)
                 
                 # Clear current content
+                self._discard_typing()
                 self.text_widget.delete("1.0", tk.END)
                 self.text_tracker.clear()
                 
@@ -364,11 +476,12 @@ class Application:
                 # Restore metadata
                 if metadata:
                     self.text_tracker.load_metadata(metadata)
+                self._mark_buffer_loaded()
                 
-                self.current_file = file_path
+                self._set_current_file(file_path)
                 self.is_modified = False
                 self.update_title()
-                self.status_bar.set_message(f"Opened: {os.path.basename(file_path)}")
+                self.status_bar.set_message(f"Opened: {self._current_basename}")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to open file:\n{str(e)}")
@@ -385,40 +498,73 @@ class Application:
         file_path = filedialog.asksaveasfilename(
             title="Save File As",
             defaultextension=".txt.lakra",
-            filetypes=[
-                ("Lakra Text files", "*.txt.lakra"),
-                ("Lakra Markdown files", "*.md.lakra"),
-                ("Lakra Python files", "*.py.lakra"),
-                ("Lakra JavaScript files", "*.js.lakra"),
-                ("Lakra HTML files", "*.html.lakra"),
-                ("Lakra CSS files", "*.css.lakra"),
-                ("Lakra JSON files", "*.json.lakra"),
-                ("All Lakra files", "*.lakra"),
-                ("All files", "*.*")
-            ]
+            filetypes=_SAVE_FILETYPES
         )
         
         if file_path:
             self.save_to_file(file_path)
     
     def save_to_file(self, file_path):
-        """Save content and metadata to the specified file."""
+        """Save content and metadata to the specified file.
+        
+        The text is captured here and written by a background worker, so the
+        editor stays responsive; the outcome is reported back on the Tk thread.
+        """
+        self._flush_typing()
         try:
             content = self.text_widget.get("1.0", tk.END + "-1c")
             metadata = self.text_tracker.get_metadata()
-            
-            self.file_manager.save_file(file_path, content, metadata)
-            
-            self.current_file = file_path
-            self.is_modified = False
-            self.update_title()
-            self.status_bar.set_message(f"Saved: {os.path.basename(file_path)}")
-            
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save file:\n{str(e)}")
+            return
+        
+        # Mark the buffer saved now so edits made during the write flag it again
+        previous_file = self.current_file
+        self._set_current_file(file_path)
+        self.is_modified = False
+        self.update_title()
+        self.status_bar.set_message(f"Saving: {self._current_basename}")
+        
+        future = self._save_executor.submit(self.file_manager.save_file, file_path, content, metadata)
+        self._track_background(future, lambda f: self._on_file_saved(file_path, previous_file, f))
+    
+    def _track_background(self, future, on_done):
+        """Call on_done(future) on the Tk thread once the background job finishes."""
+        self._background_jobs.append((future, on_done))
+        if self._background_poll_id is None and not self._shutting_down:
+            self._background_poll_id = self.root.after(_BACKGROUND_POLL_MS, self._poll_background)
+    
+    def _poll_background(self):
+        """Report finished background jobs, polling again while any are left."""
+        self._background_poll_id = None
+        # done() is asked once per job, so a job finishing mid-scan can't be lost
+        jobs, self._background_jobs = self._background_jobs, []
+        for job in jobs:
+            future, on_done = job
+            if future.done():
+                on_done(future)
+            else:
+                self._background_jobs.append(job)
+        
+        if self._background_jobs and self._background_poll_id is None and not self._shutting_down:
+            self._background_poll_id = self.root.after(_BACKGROUND_POLL_MS, self._poll_background)
+    
+    def _on_file_saved(self, file_path, previous_file, future):
+        """Report the result of a background save."""
+        error = future.exception()
+        if error is None:
+            self.status_bar.set_message(f"Saved: {os.path.basename(file_path)}")
+            return
+        
+        if self.current_file == file_path:
+            self._set_current_file(previous_file)
+        self.is_modified = True
+        self.update_title()
+        messagebox.showerror("Error", f"Failed to save file:\n{str(error)}")
     
     def show_metadata_info(self):
         """Show metadata information dialog."""
+        self._flush_typing()
         metadata = self.text_tracker.get_metadata()
         
         info_window = tk.Toplevel(self.root)
@@ -430,13 +576,12 @@ class Application:
         scrollbar = ttk.Scrollbar(info_window, orient=tk.VERTICAL, command=text_area.yview)
         text_area.configure(yscrollcommand=scrollbar.set)
         
-        # Display metadata information
+        # Display metadata information, built up front and inserted in one call
+        parts = []
         if metadata and 'ranges' in metadata:
-            text_area.insert(tk.END, "Text Input Source Tracking:\n\n")
+            parts.append("Text Input Source Tracking:\n\n")
             
-            total_chars = len(self.text_widget.get("1.0", tk.END + "-1c"))
-            typed_chars = 0
-            pasted_chars = 0
+            total_chars, typed_chars, pasted_chars, _, _ = self._compute_composition_summary()
             
             for range_info in metadata['ranges']:
                 source = range_info.get('source', 'unknown')
@@ -444,25 +589,21 @@ class Application:
                 end = range_info.get('end', 0)
                 length = end - start
                 
-                if source == 'manual':
-                    typed_chars += length
-                elif source == 'pasted':
-                    pasted_chars += length
-                
-                text_area.insert(tk.END, f"Position {start}-{end}: {source} ({length} chars)\n")
+                parts.append(f"Position {start}-{end}: {source} ({length} chars)\n")
             
-            text_area.insert(tk.END, f"\nSummary:\n")
-            text_area.insert(tk.END, f"Total characters: {total_chars}\n")
-            text_area.insert(tk.END, f"Manually typed: {typed_chars}\n")
-            text_area.insert(tk.END, f"Pasted content: {pasted_chars}\n")
+            parts.append(f"\nSummary:\n")
+            parts.append(f"Total characters: {total_chars}\n")
+            parts.append(f"Manually typed: {typed_chars}\n")
+            parts.append(f"Pasted content: {pasted_chars}\n")
             
             if total_chars > 0:
                 typed_percent = (typed_chars / total_chars) * 100
                 pasted_percent = (pasted_chars / total_chars) * 100
-                text_area.insert(tk.END, f"Typed percentage: {typed_percent:.1f}%\n")
-                text_area.insert(tk.END, f"Pasted percentage: {pasted_percent:.1f}%\n")
+                parts.append(f"Typed percentage: {typed_percent:.1f}%\n")
+                parts.append(f"Pasted percentage: {pasted_percent:.1f}%\n")
         else:
-            text_area.insert(tk.END, "No metadata available for this document.")
+            parts.append("No metadata available for this document.")
+        text_area.insert("1.0", "".join(parts))
         
         text_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -472,6 +613,7 @@ class Application:
     
     def show_statistics(self):
         """Show detailed statistics about text composition."""
+        self._flush_typing()
         metadata = self.text_tracker.get_metadata()
         
         stats_window = tk.Toplevel(self.root)
@@ -486,44 +628,26 @@ class Application:
         overview_frame = ttk.Frame(notebook)
         notebook.add(overview_frame, text="Overview")
         
-        total_chars = len(self.text_widget.get("1.0", tk.END + "-1c"))
-        typed_chars = 0
-        pasted_chars = 0
-        typing_sessions = 0
-        paste_operations = 0
-        
-        if metadata and 'ranges' in metadata:
-            for range_info in metadata['ranges']:
-                source = range_info.get('source', 'unknown')
-                start = range_info.get('start', 0)
-                end = range_info.get('end', 0)
-                length = end - start
-                
-                if source == 'manual':
-                    typed_chars += length
-                    typing_sessions += 1
-                elif source == 'pasted':
-                    pasted_chars += length
-                    paste_operations += 1
+        (total_chars, typed_chars, pasted_chars,
+         typing_sessions, paste_operations) = self._compute_composition_summary()
         
         # Overview statistics
         overview_text = tk.Text(overview_frame, wrap=tk.WORD, font=("Arial", 12))
         overview_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        overview_text.insert(tk.END, "DOCUMENT COMPOSITION ANALYSIS\n")
-        overview_text.insert(tk.END, "=" * 40 + "\n\n")
+        parts = ["DOCUMENT COMPOSITION ANALYSIS\n", "=" * 40 + "\n\n"]
         
-        overview_text.insert(tk.END, f"Total Characters: {total_chars:,}\n")
-        overview_text.insert(tk.END, f"Manually Typed: {typed_chars:,} characters\n")
-        overview_text.insert(tk.END, f"Pasted Content: {pasted_chars:,} characters\n\n")
+        parts.append(f"Total Characters: {total_chars:,}\n")
+        parts.append(f"Manually Typed: {typed_chars:,} characters\n")
+        parts.append(f"Pasted Content: {pasted_chars:,} characters\n\n")
         
         if total_chars > 0:
             typed_percent = (typed_chars / total_chars) * 100
             pasted_percent = (pasted_chars / total_chars) * 100
             
-            overview_text.insert(tk.END, f"Composition Breakdown:\n")
-            overview_text.insert(tk.END, f"  • Typed: {typed_percent:.1f}%\n")
-            overview_text.insert(tk.END, f"  • Pasted: {pasted_percent:.1f}%\n\n")
+            parts.append(f"Composition Breakdown:\n")
+            parts.append(f"  • Typed: {typed_percent:.1f}%\n")
+            parts.append(f"  • Pasted: {pasted_percent:.1f}%\n\n")
             
             # Authenticity assessment
             if pasted_percent > 70:
@@ -535,11 +659,12 @@ class Application:
             else:
                 authenticity = "Very High - Predominantly original content"
             
-            overview_text.insert(tk.END, f"Content Authenticity: {authenticity}\n\n")
+            parts.append(f"Content Authenticity: {authenticity}\n\n")
         
-        overview_text.insert(tk.END, f"Input Operations:\n")
-        overview_text.insert(tk.END, f"  • Typing Sessions: {typing_sessions}\n")
-        overview_text.insert(tk.END, f"  • Paste Operations: {paste_operations}\n")
+        parts.append(f"Input Operations:\n")
+        parts.append(f"  • Typing Sessions: {typing_sessions}\n")
+        parts.append(f"  • Paste Operations: {paste_operations}\n")
+        overview_text.insert("1.0", "".join(parts))
         
         overview_text.configure(state=tk.DISABLED)
         
@@ -551,35 +676,54 @@ class Application:
         details_scrollbar = ttk.Scrollbar(details_frame, orient=tk.VERTICAL, command=details_text.yview)
         details_text.configure(yscrollcommand=details_scrollbar.set)
         
-        if metadata and 'ranges' in metadata:
-            details_text.insert(tk.END, "DETAILED INPUT ANALYSIS\n")
-            details_text.insert(tk.END, "=" * 50 + "\n\n")
+        details_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        details_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=10)
+        
+        # The breakdown can be long, so it is only built the first time its tab is shown
+        details_built = False
+        
+        def build_details(event=None):
+            nonlocal details_built
+            if details_built or notebook.select() != str(details_frame):
+                return
+            details_built = True
             
-            for i, range_info in enumerate(metadata['ranges'], 1):
-                source = range_info.get('source', 'unknown')
-                start = range_info.get('start', 0)
-                end = range_info.get('end', 0)
-                length = end - start
-                timestamp = range_info.get('timestamp', 'Unknown')
+            self._flush_typing()
+            metadata = self.text_tracker.get_metadata()
+            
+            parts = []
+            if metadata and 'ranges' in metadata:
+                parts.append("DETAILED INPUT ANALYSIS\n")
+                parts.append("=" * 50 + "\n\n")
                 
-                details_text.insert(tk.END, f"Operation #{i}:\n")
-                details_text.insert(tk.END, f"  Type: {source.upper()}\n")
-                details_text.insert(tk.END, f"  Position: {start:,} - {end:,}\n")
-                details_text.insert(tk.END, f"  Length: {length:,} characters\n")
-                details_text.insert(tk.END, f"  Time: {timestamp}\n")
+                # Fetch the document once and slice previews in Python
+                full_text = self.text_widget.get("1.0", tk.END + "-1c")
                 
-                # Show preview of content
-                content = self.text_widget.get(f"1.0+{start}c", f"1.0+{end}c")
-                preview = content[:100] + "..." if len(content) > 100 else content
-                preview = preview.replace('\n', '\\n').replace('\t', '\\t')
-                details_text.insert(tk.END, f"  Preview: \"{preview}\"\n")
-                details_text.insert(tk.END, "-" * 40 + "\n")
-        else:
-            details_text.insert(tk.END, "No detailed tracking data available.")
+                for i, range_info in enumerate(metadata['ranges'], 1):
+                    source = range_info.get('source', 'unknown')
+                    start = range_info.get('start', 0)
+                    end = range_info.get('end', 0)
+                    length = end - start
+                    timestamp = range_info.get('timestamp', 'Unknown')
+                    
+                    parts.append(f"Operation #{i}:\n")
+                    parts.append(f"  Type: {source.upper()}\n")
+                    parts.append(f"  Position: {start:,} - {end:,}\n")
+                    parts.append(f"  Length: {length:,} characters\n")
+                    parts.append(f"  Time: {timestamp}\n")
+                    
+                    # Show preview of content
+                    content = full_text[start:min(end, start + 101)]
+                    preview = content[:100] + "..." if len(content) > 100 else content
+                    preview = preview.replace('\n', '\\n').replace('\t', '\\t')
+                    parts.append(f"  Preview: \"{preview}\"\n")
+                    parts.append("-" * 40 + "\n")
+            else:
+                parts.append("No detailed tracking data available.")
+            details_text.insert("1.0", "".join(parts))
+            details_text.configure(state=tk.DISABLED)
         
-        details_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
-        details_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=10)
-        details_text.configure(state=tk.DISABLED)
+        notebook.bind('<<NotebookTabChanged>>', build_details)
     
     def export_analysis_report(self):
         """Export a comprehensive analysis report."""
@@ -598,40 +742,29 @@ class Application:
             return
         
         try:
+            self._flush_typing()
             metadata = self.text_tracker.get_metadata()
-            total_chars = len(self.text_widget.get("1.0", tk.END + "-1c"))
-            typed_chars = 0
-            pasted_chars = 0
-            
-            if metadata and 'ranges' in metadata:
-                for range_info in metadata['ranges']:
-                    source = range_info.get('source', 'unknown')
-                    start = range_info.get('start', 0)
-                    end = range_info.get('end', 0)
-                    length = end - start
-                    
-                    if source == 'manual':
-                        typed_chars += length
-                    elif source == 'pasted':
-                        pasted_chars += length
+            total_chars, typed_chars, pasted_chars, _, _ = self._compute_composition_summary()
             
             # Generate report content
             from datetime import datetime
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            typed_pct = (typed_chars / total_chars * 100) if total_chars else 0.0
+            pasted_pct = (pasted_chars / total_chars * 100) if total_chars else 0.0
             
-            report_content = f"""GHOSTKEY TEXT ANALYSIS REPORT
+            parts = [f"""GHOSTKEY TEXT ANALYSIS REPORT
 Generated: {current_time}
 File: {self.current_file or 'Untitled'}
 
 SUMMARY
 =======
 Total Characters: {total_chars:,}
-Manually Typed: {typed_chars:,} characters ({(typed_chars/total_chars*100):.1f}% if total_chars else 0)
-Pasted Content: {pasted_chars:,} characters ({(pasted_chars/total_chars*100):.1f}% if total_chars else 0)
+Manually Typed: {typed_chars:,} characters ({typed_pct:.1f}%)
+Pasted Content: {pasted_chars:,} characters ({pasted_pct:.1f}%)
 
 AUTHENTICITY ASSESSMENT
 ======================
-"""
+"""]
             
             if total_chars > 0:
                 pasted_percent = (pasted_chars / total_chars) * 100
@@ -644,11 +777,11 @@ AUTHENTICITY ASSESSMENT
                 else:
                     assessment = "VERY HIGH AUTHENTICITY - Predominantly original content"
                 
-                report_content += f"{assessment}\n\n"
+                parts.append(f"{assessment}\n\n")
             
             if metadata and 'ranges' in metadata:
-                report_content += "DETAILED BREAKDOWN\n"
-                report_content += "==================\n"
+                parts.append("DETAILED BREAKDOWN\n")
+                parts.append("==================\n")
                 
                 for i, range_info in enumerate(metadata['ranges'], 1):
                     source = range_info.get('source', 'unknown')
@@ -657,21 +790,35 @@ AUTHENTICITY ASSESSMENT
                     length = end - start
                     timestamp = range_info.get('timestamp', 'Unknown')
                     
-                    report_content += f"\nOperation #{i}:\n"
-                    report_content += f"  Type: {source.upper()}\n"
-                    report_content += f"  Position: {start:,} - {end:,}\n"
-                    report_content += f"  Length: {length:,} characters\n"
-                    report_content += f"  Timestamp: {timestamp}\n"
-            
-            # Save the report
-            with open(report_path, 'w', encoding='utf-8') as f:
-                f.write(report_content)
+                    parts.append(f"\nOperation #{i}:\n")
+                    parts.append(f"  Type: {source.upper()}\n")
+                    parts.append(f"  Position: {start:,} - {end:,}\n")
+                    parts.append(f"  Length: {length:,} characters\n")
+                    parts.append(f"  Timestamp: {timestamp}\n")
             
-            self.status_bar.set_message(f"Analysis report exported: {os.path.basename(report_path)}")
-            messagebox.showinfo("Export Complete", f"Analysis report saved to:\n{report_path}")
+            report_content = "".join(parts)
             
         except Exception as e:
             messagebox.showerror("Export Error", f"Failed to export report:\n{str(e)}")
+            return
+        
+        def write_report():
+            # Runs on the save worker; the result is picked up by _poll_background
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write(report_content)
+        
+        future = self._save_executor.submit(write_report)
+        self._track_background(future, lambda f: self._on_report_exported(report_path, f))
+    
+    def _on_report_exported(self, report_path, future):
+        """Report the result of a background export."""
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("Export Error", f"Failed to export report:\n{str(error)}")
+            return
+        
+        self.status_bar.set_message(f"Analysis report exported: {os.path.basename(report_path)}")
+        messagebox.showinfo("Export Complete", f"Analysis report saved to:\n{report_path}")
     
     def confirm_unsaved_changes(self):
         """Ask user to confirm losing unsaved changes."""
@@ -688,11 +835,16 @@ AUTHENTICITY ASSESSMENT
         else:  # Cancel
             return False
     
+    def _set_current_file(self, file_path):
+        """Remember the file being edited along with its display name."""
+        self.current_file = file_path
+        self._current_basename = os.path.basename(file_path) if file_path else None
+    
     def update_title(self):
         """Update the window title."""
         title = "GhostKey - Text Editor"
         if self.current_file:
-            title += f" - {os.path.basename(self.current_file)}"
+            title += f" - {self._current_basename}"
         if self.is_modified:
             title += " *"
         self.root.title(title)
@@ -702,6 +854,23 @@ AUTHENTICITY ASSESSMENT
         if self.is_modified and not self.confirm_unsaved_changes():
             return
         
+        # Let queued background writes finish and report them here, since
+        # nothing polls for them once the main loop has stopped
+        self._shutting_down = True
+        if self._background_poll_id is not None:
+            self.root.after_cancel(self._background_poll_id)
+            self._background_poll_id = None
+        jobs, self._background_jobs = self._background_jobs, []
+        wait([future for future, _ in jobs])
+        for future, on_done in jobs:
+            on_done(future)
+        
+        if any(future.exception() is not None for future, _ in jobs):
+            # The failure has been shown; stay open so the user can retry
+            self._shutting_down = False
+            return
+        
+        self._save_executor.shutdown(wait=True)
         self.root.quit()
 
 
@@ -4,7 +4,15 @@ Metadata Manager - Handles metadata serialization and deserialization.
 
 import json
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
+
+# Built once so each call skips json.dumps/json.loads option handling. Metadata
+# is plain acyclic dicts and lists, so the encoder's per-container cycle
+# bookkeeping is switched off; a cycle surfaces as RecursionError instead.
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), check_circular=False).encode
+_decode = json.JSONDecoder().decode
+
+_VALID_SOURCES = frozenset(('manual', 'pasted'))
 
 
 class MetadataManager:
@@ -25,18 +33,22 @@ class MetadataManager:
             }
 
             # Compact JSON with no indentation or extra spaces
-            return json.dumps(serialized, separators=(',', ':'), ensure_ascii=False)
+            return _encode(serialized)
 
-        except Exception as e:
-            raise Exception(f"Failed to serialize metadata: {str(e)}")
+        except (TypeError, ValueError, RecursionError) as e:
+            raise ValueError(f"Failed to serialize metadata: {str(e)}") from e
 
-    def deserialize_metadata(self, metadata_str: str) -> Optional[Dict[str, Any]]:
-        """Deserialize metadata from JSON string."""
+    def deserialize_metadata(self, metadata_str: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+        """Deserialize metadata from a JSON string or UTF-8 bytes."""
         try:
-            if not metadata_str.strip():
+            # The decoder skips surrounding whitespace itself, so no strip() copy
+            if not metadata_str or metadata_str.isspace():
                 return None
 
-            data = json.loads(metadata_str)
+            if isinstance(metadata_str, bytes):
+                metadata_str = metadata_str.decode('utf-8')
+
+            data = _decode(metadata_str)
 
             if 'ghostkey_metadata' in data:
                 return data['ghostkey_metadata']['data']
@@ -70,24 +82,22 @@ class MetadataManager:
                 if not isinstance(range_info, dict):
                     return False
 
-                required_fields = ['start', 'end', 'source']
-                for field in required_fields:
-                    if field not in range_info:
-                        return False
-
-                if not isinstance(range_info['start'], int):
-                    return False
-                if not isinstance(range_info['end'], int):
-                    return False
-                if not isinstance(range_info['source'], str):
+                # One lookup per field; a missing one fails the whole check
+                try:
+                    start = range_info['start']
+                    end = range_info['end']
+                    source = range_info['source']
+                except KeyError:
                     return False
 
-                if range_info['start'] < 0 or range_info['end'] < 0:
+                if not (isinstance(start, int) and isinstance(end, int) and isinstance(source, str)):
                     return False
-                if range_info['start'] >= range_info['end']:
+
+                # end > start >= 0 also rules out a negative end
+                if start < 0 or start >= end:
                     return False
 
-                if range_info['source'] not in ['manual', 'pasted']:
+                if source not in _VALID_SOURCES:
                     return False
 
             return True
@@ -104,15 +114,27 @@ class MetadataManager:
                 'ranges': []
             }
 
-            all_ranges = []
-
-            if metadata1 and 'ranges' in metadata1:
-                all_ranges.extend(metadata1['ranges'])
+            ranges1 = metadata1['ranges'] if metadata1 and 'ranges' in metadata1 else []
+            ranges2 = metadata2['ranges'] if metadata2 and 'ranges' in metadata2 else []
 
-            if metadata2 and 'ranges' in metadata2:
-                all_ranges.extend(metadata2['ranges'])
-
-            all_ranges.sort(key=lambda x: x.get('start', 0))
+            # Both lists are kept sorted by start, so they can be zipped
+            # together in one pass; when the second list starts after the
+            # first ends (the usual append-only case) no zipping is needed.
+            if not ranges1 or not ranges2 or ranges1[-1]['end'] < ranges2[0]['start']:
+                all_ranges = ranges1 + ranges2
+            else:
+                all_ranges = []
+                i = j = 0
+                len1, len2 = len(ranges1), len(ranges2)
+                while i < len1 and j < len2:
+                    if ranges2[j]['start'] < ranges1[i]['start']:
+                        all_ranges.append(ranges2[j])
+                        j += 1
+                    else:
+                        all_ranges.append(ranges1[i])
+                        i += 1
+                all_ranges.extend(ranges1[i:])
+                all_ranges.extend(ranges2[j:])
 
             merged_ranges = []
 
@@ -155,23 +177,26 @@ class MetadataManager:
             ranges = metadata['ranges']
             stats['total_ranges'] = len(ranges)
 
-            tracked_chars = 0
+            # Accumulate in locals and store into stats once at the end
+            tracked_chars = typed_chars = pasted_chars = typed_ranges = pasted_ranges = 0
 
             for range_info in ranges:
-                start = range_info.get('start', 0)
-                end = range_info.get('end', 0)
-                source = range_info.get('source', 'unknown')
-                length = end - start
-
+                get = range_info.get
+                length = get('end', 0) - get('start', 0)
                 tracked_chars += length
 
+                source = get('source')
                 if source == 'manual':
-                    stats['typed_chars'] += length
-                    stats['typed_ranges'] += 1
+                    typed_chars += length
+                    typed_ranges += 1
                 elif source == 'pasted':
-                    stats['pasted_chars'] += length
-                    stats['pasted_ranges'] += 1
+                    pasted_chars += length
+                    pasted_ranges += 1
 
+            stats['typed_chars'] = typed_chars
+            stats['pasted_chars'] = pasted_chars
+            stats['typed_ranges'] = typed_ranges
+            stats['pasted_ranges'] = pasted_ranges
             stats['unknown_chars'] = max(0, total_length - tracked_chars)
 
             if total_length > 0:
@@ -0,0 +1,92 @@
+"""
+Tests for the background job polling in the GhostKey editor.
+"""
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from ghost_key_editor import Application
+
+
+class FlippingFuture:
+    """Future whose done() reports False once, then True."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def done(self):
+        self.calls += 1
+        return self.calls > 1
+
+
+class FixedFuture:
+    """Future whose done() always reports the given state."""
+    
+    def __init__(self, done):
+        self._done = done
+    
+    def done(self):
+        return self._done
+
+
+def make_app(jobs):
+    """Build just enough of an Application for _poll_background."""
+    root = mock.Mock()
+    root.after.return_value = "after#1"
+    return SimpleNamespace(
+        root=root,
+        _background_jobs=list(jobs),
+        _background_poll_id="after#0",
+        _shutting_down=False,
+        _poll_background=lambda: None,
+    )
+
+
+class PollBackgroundTests(unittest.TestCase):
+    
+    def test_job_finishing_mid_poll_is_reported_later(self):
+        future = FlippingFuture()
+        on_done = mock.Mock()
+        app = make_app([(future, on_done)])
+        
+        Application._poll_background(app)
+        self.assertEqual(future.calls, 1)
+        on_done.assert_not_called()
+        self.assertEqual(app._background_jobs, [(future, on_done)])
+        app.root.after.assert_called_once()
+        
+        Application._poll_background(app)
+        on_done.assert_called_once_with(future)
+        self.assertEqual(app._background_jobs, [])
+    
+    def test_finished_jobs_run_and_pending_jobs_are_kept(self):
+        finished, pending = FixedFuture(True), FixedFuture(False)
+        finished_done, pending_done = mock.Mock(), mock.Mock()
+        app = make_app([(finished, finished_done), (pending, pending_done)])
+        
+        Application._poll_background(app)
+        finished_done.assert_called_once_with(finished)
+        pending_done.assert_not_called()
+        self.assertEqual(app._background_jobs, [(pending, pending_done)])
+        self.assertEqual(app._background_poll_id, "after#1")
+    
+    def test_no_reschedule_once_all_jobs_are_done(self):
+        future, on_done = FixedFuture(True), mock.Mock()
+        app = make_app([(future, on_done)])
+        
+        Application._poll_background(app)
+        on_done.assert_called_once_with(future)
+        app.root.after.assert_not_called()
+        self.assertIsNone(app._background_poll_id)
+    
+    def test_no_reschedule_while_shutting_down(self):
+        app = make_app([(FixedFuture(False), mock.Mock())])
+        app._shutting_down = True
+        
+        Application._poll_background(app)
+        app.root.after.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,18 +3,64 @@ Text Tracker - Manages tracking of text input sources and metadata.
 """
 
 import tkinter as tk
-import threading
 import time
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+
+# Input sources are stored as small ints internally and converted to their
+# names only where metadata enters or leaves the tracker
+SOURCE_MANUAL = 0
+SOURCE_PASTED = 1
+SOURCE_UNKNOWN = 2
+SOURCE_NAMES = ('manual', 'pasted', 'unknown')
+_SOURCE_CODES = {name: code for code, name in enumerate(SOURCE_NAMES)}
+
+# The tracking and conversion methods run per keystroke and mouse move, so
+# their recoverable errors go to a debug logger rather than stdout
+log = logging.getLogger(__name__)
 
 class TextTracker:
     """Tracks text input sources and maintains metadata."""
 
     def __init__(self):
         self.text_widget = None
-        self.input_ranges = []  # List of {start, end, source, timestamp}
-        self.lock = threading.Lock()
+        self.input_ranges = []  # List of {start, end, source code, timestamp}
         self.last_cursor_pos = "1.0"
 
+        # Composition totals, kept in step with input_ranges
+        self.typed_char_count = 0
+        self.pasted_char_count = 0
+        self.typed_range_count = 0
+        self.pasted_range_count = 0
+
+        # Start and end offsets of input_ranges, for bisecting by position
+        self._range_starts = array('q')
+        self._range_ends = array('q')
+        # Bumped whenever input_ranges changes, so readers can cache lookups
+        self.ranges_version = 0
+
+        # Widget text and the offset at which each of its lines starts,
+        # both fetched lazily and dropped together when the text changes
+        self._text = None
+        self._line_starts = None
+        self._text_length = 0
+
+        # Hover highlight currently applied as (tag, start_pos, end_pos), and the
+        # index and line table it was computed for
+        self._hover_tagged = None
+        self._hover_index = None
+        self._hover_line_starts = None
+
+        # Last range_to_positions result as (range, ranges_version, line table, positions)
+        self._range_positions = None
+
+        # Latest pointer position and the idle callbacks that coalesce
+        # bursts of motion and selection events into one update
+        self._pending_hover = None
+        self._hover_after_id = None
+        self._selection_after_id = None
+
     def set_text_widget(self, text_widget):
         """Set the text widget to track."""
         self.text_widget = text_widget
@@ -35,21 +81,22 @@ class TextTracker:
 
     def clear(self):
         """Clear all tracking data."""
-        with self.lock:
-            self.input_ranges.clear()
-            self.last_cursor_pos = "1.0"
+        self.input_ranges.clear()
+        self.last_cursor_pos = "1.0"
+        self.invalidate_text_cache()
+        self._recount()
 
     def track_manual_input(self, position, character):
         """Track manually typed input."""
         if not self.text_widget:
             return
         try:
-            with self.lock:
-                start_idx = self._pos_to_index(position)
-                end_idx = start_idx + len(character)
-                self._update_ranges(start_idx, end_idx, 'manual')
-        except Exception as e:
-            print(f"Error tracking manual input: {e}")
+            self.invalidate_text_cache()  # The text was just inserted
+            start_idx = self._pos_to_index(position)
+            end_idx = start_idx + len(character)
+            self._update_ranges(start_idx, end_idx, SOURCE_MANUAL)
+        except (ValueError, tk.TclError):
+            log.debug("Error tracking manual input", exc_info=True)
 
     
     def track_paste_input(self, position, content):
@@ -57,100 +104,203 @@ class TextTracker:
         if not self.text_widget or not content:
             return
         try:
-            with self.lock:
-                start_idx = self._pos_to_index(position)
-                end_idx = start_idx + len(content)
-                self._update_ranges(start_idx, end_idx, 'pasted')
-        except Exception as e:
-            print(f"Error tracking paste input: {e}")
+            self.invalidate_text_cache()  # The text was just inserted
+            start_idx = self._pos_to_index(position)
+            end_idx = start_idx + len(content)
+            self._update_ranges(start_idx, end_idx, SOURCE_PASTED)
+        except (ValueError, tk.TclError):
+            log.debug("Error tracking paste input", exc_info=True)
+
+    def invalidate_text_cache(self):
+        """Forget the cached text and line offsets; call whenever the widget text changes."""
+        self._text = None
+        self._line_starts = None
+
+    def _get_text(self):
+        """Return the widget text, fetching it at most once per change."""
+        if self._text is None:
+            self._text = self.text_widget.get("1.0", tk.END + "-1c")
+        return self._text
+
+    def _get_text_length(self):
+        """Return the widget text length, letting Tk count it when the text isn't cached."""
+        if self._text is not None:
+            return len(self._text)
+        return (self.text_widget.count("1.0", tk.END + "-1c", "chars") or (0,))[0]
+
+    def _get_line_starts(self):
+        """Return the character offset at which each line starts."""
+        if self._line_starts is None:
+            text_content = self._get_text()
+            line_starts = array('q', [0])
+            pos = text_content.find('\n')
+            while pos != -1:
+                line_starts.append(pos + 1)
+                pos = text_content.find('\n', pos + 1)
+            self._line_starts = line_starts
+            self._text_length = len(text_content)
+        return self._line_starts
 
     def _pos_to_index(self, position):
         """Convert Tkinter text position to character index."""
         try:
             if isinstance(position, str):
                 line, col = position.split('.')
-                line = int(line) - 1
+                line = int(line)
                 col = int(col)
-                text_content = self.text_widget.get("1.0", tk.END + "-1c")
-                lines = text_content.split('\n')
-                index = 0
-                for i in range(line):
-                    if i < len(lines):
-                        index += len(lines[i]) + 1
-                index += min(col, len(lines[line]) if line < len(lines) else 0)
-                return index
+                line_starts = self._get_line_starts()
+                if line < 1:
+                    return 0
+                if line > len(line_starts):
+                    return self._text_length
+                line_start = line_starts[line - 1]
+                line_end = line_starts[line] - 1 if line < len(line_starts) else self._text_length
+                return line_start + min(col, line_end - line_start)
             else:
                 return int(position)
-        except Exception as e:
-            print(f"Error converting position to index: {e}")
+        except (ValueError, TypeError, tk.TclError):
+            log.debug("Error converting position to index", exc_info=True)
             return 0
 
     def _index_to_pos(self, index):
         """Convert character index to Tkinter text position."""
         try:
-            text_content = self.text_widget.get("1.0", tk.END + "-1c")
-            if index >= len(text_content):
-                return f"{len(text_content.split(chr(10)))}.{len(text_content.split(chr(10))[-1])}"
-            lines = text_content[:index].split('\n')
-            return f"{len(lines)}.{len(lines[-1])}"
-        except Exception as e:
-            print(f"Error converting index to position: {e}")
+            line_starts = self._get_line_starts()
+            index = min(max(index, 0), self._text_length)
+            line = bisect_right(line_starts, index)
+            return f"{line}.{index - line_starts[line - 1]}"
+        except (ValueError, TypeError, tk.TclError):
+            log.debug("Error converting index to position", exc_info=True)
             return "1.0"
 
+    def range_to_positions(self, range_info):
+        """Return the Tkinter (start, end) positions of a range.
+
+        Hover asks for the same range repeatedly, so the last answer is kept
+        until the range, the ranges or the text change.
+        """
+        line_starts = self._get_line_starts()
+        cached = self._range_positions
+        if (cached and cached[0] is range_info and cached[1] == self.ranges_version
+                and cached[2] is line_starts):
+            return cached[3]
+        positions = (self._index_to_pos(range_info['start']), self._index_to_pos(range_info['end']))
+        self._range_positions = (range_info, self.ranges_version, line_starts, positions)
+        return positions
+
+    def recolor_all(self, typed_tag, pasted_tag, dirty=None):
+        """Re-apply the typed/pasted tags, only within the (start, end) span dirty if given.
+
+        Indices are given relative to "1.0" for Tk to resolve, so the text is
+        never fetched, and every range of a tag goes to Tk in one tag_add call.
+        """
+        if not self.text_widget:
+            return
+
+        if dirty is None:
+            ranges = self.input_ranges
+            clear_start, clear_end = "1.0", "end"
+        else:
+            dirty_start, dirty_end = dirty
+            ranges = [rng for rng in self.input_ranges
+                      if rng['start'] < dirty_end and rng['end'] > dirty_start]
+            clear_start, clear_end = f"1.0 + {dirty_start} chars", f"1.0 + {dirty_end} chars"
+        self.text_widget.tag_remove(typed_tag, clear_start, clear_end)
+        self.text_widget.tag_remove(pasted_tag, clear_start, clear_end)
+
+        typed_indices = []
+        pasted_indices = []
+        for rng in ranges:
+            indices = typed_indices if rng['source'] == SOURCE_MANUAL else pasted_indices
+            indices.append(f"1.0 + {rng['start']} chars")
+            indices.append(f"1.0 + {rng['end']} chars")
+
+        if typed_indices:
+            self.text_widget.tag_add(typed_tag, *typed_indices)
+        if pasted_indices:
+            self.text_widget.tag_add(pasted_tag, *pasted_indices)
+
     def _handle_deletions(self):
-        """Adjust metadata when text is deleted."""
-        current_length = len(self.text_widget.get("1.0", tk.END + "-1c"))
-        new_ranges = []
-        for r in self.input_ranges:
-            if r['start'] >= current_length:
-                continue  # Entirely deleted
-            r['end'] = min(r['end'], current_length)
-            if r['end'] > r['start']:
-                new_ranges.append(r)
-        self.input_ranges = new_ranges
+        """Adjust metadata when text is deleted; return True if any range was trimmed."""
+        # The line table was just rebuilt for the position lookup, so its length is current
+        self._get_line_starts()
+        current_length = self._text_length
+
+        # Ranges are sorted, so only the trailing ones can reach past the end
+        ranges = self.input_ranges
+        trimmed = False
+        while ranges and ranges[-1]['start'] >= current_length:
+            ranges.pop()  # Entirely deleted
+            trimmed = True
+        if ranges and ranges[-1]['end'] > current_length:
+            ranges[-1]['end'] = current_length
+            trimmed = True
+        return trimmed
 
     def _update_ranges(self, start_idx, end_idx, source):
         """Update ranges for new input & handle deletions automatically."""
-        self._handle_deletions()  # Check for deleted characters first
+        trimmed = self._handle_deletions()  # Check for deleted characters first
+
+        # Input after every tracked range (typing at the end of the text) only
+        # extends or follows the last range. Extending keeps the range's
+        # original timestamp, so the clock is only read for a new range.
+        ranges = self.input_ranges
+        if not ranges or ranges[-1]['end'] <= start_idx:
+            last = ranges[-1] if ranges else None
+            added_range = not (last and last['source'] == source and last['end'] == start_idx)
+            if added_range:
+                ranges.append({
+                    'start': start_idx,
+                    'end': end_idx,
+                    'source': source,
+                    'timestamp': time.time()
+                })
+            else:
+                last['end'] = end_idx
+            if trimmed:
+                self._recount()
+            else:
+                self._count_append(start_idx, end_idx, source, added_range)
+            return
 
+        new_range = {
+            'start': start_idx,
+            'end': end_idx,
+            'source': source,
+            'timestamp': time.time()
+        }
+
+        # Ranges are sorted and disjoint, so one ordered pass can place the new
+        # range between the ones it precedes and follows without re-sorting.
+        # Existing range dicts are shifted in place rather than copied.
         insertion_length = end_idx - start_idx
         new_ranges = []
-        for r in self.input_ranges:
+        for r in ranges:
             r_start, r_end = r['start'], r['end']
 
             if r_end <= start_idx:
-                new_ranges.append(r.copy())
+                new_ranges.append(r)
             elif r_start >= start_idx:
+                if new_range is not None:
+                    new_ranges.append(new_range)
+                    new_range = None
+                r['start'] = r_start + insertion_length
+                r['end'] = r_end + insertion_length
+                new_ranges.append(r)
+            else:
+                # The new input lands inside this range and splits it in two:
+                # the range keeps the head and only the tail is a new dict
+                r['end'] = start_idx
+                new_ranges.append(r)
+                new_ranges.append(new_range)
+                new_range = None
                 new_ranges.append({
-                    'start': r_start + insertion_length,
+                    'start': end_idx,
                     'end': r_end + insertion_length,
                     'source': r['source'],
                     'timestamp': r['timestamp']
                 })
-            else:
-                if r_start < start_idx:
-                    new_ranges.append({
-                        'start': r_start,
-                        'end': start_idx,
-                        'source': r['source'],
-                        'timestamp': r['timestamp']
-                    })
-                if r_end > start_idx:
-                    new_ranges.append({
-                        'start': end_idx,
-                        'end': r_end + insertion_length,
-                        'source': r['source'],
-                        'timestamp': r['timestamp']
-                    })
-
-        new_ranges.append({
-            'start': start_idx,
-            'end': end_idx,
-            'source': source,
-            'timestamp': time.time()
-        })
 
-        new_ranges.sort(key=lambda x: x['start'])
         merged = []
         for r in new_ranges:
             if merged and merged[-1]['source'] == r['source'] and merged[-1]['end'] == r['start']:
@@ -158,50 +308,98 @@ class TextTracker:
             else:
                 merged.append(r)
         self.input_ranges = merged
+        self._recount()
+
+    def _recount(self):
+        """Recompute the composition totals and range bounds after input_ranges changed."""
+        ranges = self.input_ranges
+        self.ranges_version += 1
+        self._range_starts = array('q', [r['start'] for r in ranges])
+        self._range_ends = array('q', [r['end'] for r in ranges])
+        typed_chars = pasted_chars = typed_ranges = pasted_ranges = 0
+        for r in ranges:
+            if r['source'] == SOURCE_MANUAL:
+                typed_chars += r['end'] - r['start']
+                typed_ranges += 1
+            elif r['source'] == SOURCE_PASTED:
+                pasted_chars += r['end'] - r['start']
+                pasted_ranges += 1
+        self.typed_char_count = typed_chars
+        self.pasted_char_count = pasted_chars
+        self.typed_range_count = typed_ranges
+        self.pasted_range_count = pasted_ranges
+
+    def _count_append(self, start_idx, end_idx, source, added_range):
+        """Update the totals and range bounds for input placed after every range.
+
+        Typing at the end of the text is the common case, and this keeps it
+        O(1) instead of re-walking every range in _recount.
+        """
+        self.ranges_version += 1
+        if added_range:
+            self._range_starts.append(start_idx)
+            self._range_ends.append(end_idx)
+        else:
+            self._range_ends[-1] = end_idx
+        length = end_idx - start_idx
+        if source == SOURCE_MANUAL:
+            self.typed_char_count += length
+            if added_range:
+                self.typed_range_count += 1
+        elif source == SOURCE_PASTED:
+            self.pasted_char_count += length
+            if added_range:
+                self.pasted_range_count += 1
+
+    def get_composition_counts(self):
+        """Return (typed_chars, pasted_chars, typing_sessions, paste_operations)."""
+        return (self.typed_char_count, self.pasted_char_count,
+                self.typed_range_count, self.pasted_range_count)
 
     def get_source_at_position(self, position):
         """Get the input source at a specific position."""
         try:
-            with self.lock:
-                index = self._pos_to_index(position)
-                for range_info in self.input_ranges:
-                    if range_info['start'] <= index < range_info['end']:
-                        return range_info['source']
-                return None
-        except Exception as e:
-            print(f"Error getting source at position: {e}")
+            index = self._pos_to_index(position)
+            # Ranges are sorted and disjoint: only the last one starting
+            # at or before index can contain it
+            i = bisect_right(self._range_starts, index) - 1
+            if i >= 0 and self._range_ends[i] > index:
+                return SOURCE_NAMES[self.input_ranges[i]['source']]
+            return None
+        except (ValueError, tk.TclError):
+            log.debug("Error getting source at position", exc_info=True)
             return None
 
     def get_metadata(self):
         """Get all metadata as a dictionary."""
-        with self.lock:
-            return {
-                'version': '1.1',
-                'ranges': [
-                    {
-                        'start': r['start'],
-                        'end': r['end'],
-                        'source': r['source'],
-                        'timestamp': r['timestamp']
-                    }
-                    for r in self.input_ranges
-                ]
-            }
+        return {
+            'version': '1.1',
+            'ranges': [
+                {
+                    'start': r['start'],
+                    'end': r['end'],
+                    'source': SOURCE_NAMES[r['source']],
+                    'timestamp': r['timestamp']
+                }
+                for r in self.input_ranges
+            ]
+        }
 
     def load_metadata(self, metadata):
         """Load metadata from a dictionary."""
         if not metadata or 'ranges' not in metadata:
             return
-        with self.lock:
-            self.input_ranges = []
-            for range_data in metadata['ranges']:
-                self.input_ranges.append({
-                    'start': range_data.get('start', 0),
-                    'end': range_data.get('end', 0),
-                    'source': range_data.get('source', 'unknown'),
-                    'timestamp': range_data.get('timestamp', time.time())
-                })
-            self.input_ranges.sort(key=lambda x: x['start'])
+        self.input_ranges = []
+        for range_data in metadata['ranges']:
+            self.input_ranges.append({
+                'start': range_data.get('start', 0),
+                'end': range_data.get('end', 0),
+                'source': _SOURCE_CODES.get(range_data.get('source'), SOURCE_UNKNOWN),
+                'timestamp': range_data.get('timestamp', time.time())
+            })
+        self.input_ranges.sort(key=lambda x: x['start'])
+        self._recount()
+        self.invalidate_text_cache()
 
     def update_cursor_position(self):
         """Update the last known cursor position."""
@@ -214,12 +412,13 @@ class TextTracker:
     def get_ranges_in_area(self, start_pos, end_pos):
         """Get all ranges that intersect with the given area."""
         try:
-            with self.lock:
-                start_idx = self._pos_to_index(start_pos)
-                end_idx = self._pos_to_index(end_pos)
-                return [r for r in self.input_ranges if r['start'] < end_idx and r['end'] > start_idx]
-        except Exception as e:
-            print(f"Error getting ranges in area: {e}")
+            start_idx = self._pos_to_index(start_pos)
+            end_idx = self._pos_to_index(end_pos)
+            lo = bisect_right(self._range_ends, start_idx)
+            hi = bisect_left(self._range_starts, end_idx)
+            return self.input_ranges[lo:hi]
+        except (ValueError, tk.TclError):
+            log.debug("Error getting ranges in area", exc_info=True)
             return []
 
     # ✅ NEW FUNCTIONS FOR HOVER & SELECTION FIX
@@ -228,23 +427,44 @@ class TextTracker:
         """Change color on hover (manual = green, pasted = red) but don't override selection."""
         if not self.text_widget:
             return
-        index = self.text_widget.index(f"@{event.x},{event.y}")
-        source = self.get_source_at_position(index)
-
-        # Remove old hover tags
-        self.text_widget.tag_remove("manual_green", "1.0", tk.END)
-        self.text_widget.tag_remove("pasted_red", "1.0", tk.END)
-
-        if source:
-            idx = self._pos_to_index(index)
-            for r in self.input_ranges:
-                if r['start'] <= idx < r['end']:
-                    start_pos = self._index_to_pos(r['start'])
-                    end_pos = self._index_to_pos(r['end'])
-                    if source == "manual":
-                        self.text_widget.tag_add("manual_green", start_pos, end_pos)
-                    elif source == "pasted":
-                        self.text_widget.tag_add("pasted_red", start_pos, end_pos)
+        # Motion fires per pixel; only the last position before idle matters
+        self._pending_hover = (event.x, event.y)
+        if self._hover_after_id is None:
+            self._hover_after_id = self.text_widget.after_idle(self._do_hover)
+
+    def _do_hover(self):
+        """Apply the hover highlight for the latest pointer position."""
+        self._hover_after_id = None
+        x, y = self._pending_hover
+        index = self.text_widget.index(f"@{x},{y}")
+        line_starts = self._get_line_starts()
+        if index == self._hover_index and line_starts is self._hover_line_starts:
+            return  # Still over the same character of the same text
+
+        # One bisect finds the only range that can contain the pointer
+        hover = None
+        idx = self._pos_to_index(index)
+        i = bisect_right(self._range_starts, idx) - 1
+        if i >= 0 and self._range_ends[i] > idx:
+            r = self.input_ranges[i]
+            if r['source'] != SOURCE_UNKNOWN:
+                tag = "manual_green" if r['source'] == SOURCE_MANUAL else "pasted_red"
+                hover = (tag, self._index_to_pos(r['start']), self._index_to_pos(r['end']))
+
+        # Only touch the tags when the highlighted range changed
+        text_changed = line_starts is not self._hover_line_starts
+        if hover != self._hover_tagged or text_changed:
+            if self._hover_tagged:
+                if text_changed:
+                    # Positions recorded before an edit may be stale
+                    self.text_widget.tag_remove(self._hover_tagged[0], "1.0", tk.END)
+                else:
+                    self.text_widget.tag_remove(*self._hover_tagged)
+            if hover:
+                self.text_widget.tag_add(*hover)
+            self._hover_tagged = hover
+        self._hover_index = index
+        self._hover_line_starts = line_starts
 
         # Ensure selection stays visible
         self.text_widget.tag_raise("selection_blue")
@@ -253,6 +473,13 @@ class TextTracker:
         """Always show blue selection over hover colors."""
         if not self.text_widget:
             return
+        # Fires on every key release; the selection is read once at idle time
+        if self._selection_after_id is None:
+            self._selection_after_id = self.text_widget.after_idle(self._do_selection_changed)
+
+    def _do_selection_changed(self):
+        """Retag the blue selection from the widget's current selection."""
+        self._selection_after_id = None
         try:
             sel_start = self.text_widget.index(tk.SEL_FIRST)
             sel_end = self.text_widget.index(tk.SEL_LAST)
@@ -274,29 +501,60 @@ class TextTracker:
         if not self.text_widget:
             return
 
-        current_text = self.text_widget.get("1.0", tk.END + "-1c")
-        with self.lock:
-            self.input_ranges.clear()
-            if current_text:  # Mark all restored text as manual
-                self.input_ranges.append({
-                    'start': 0,
-                    'end': len(current_text),
-                    'source': 'manual',
-                    'timestamp': time.time()
-                })
+        # Only the length is needed, so the text itself is never copied out
+        self.invalidate_text_cache()
+        text_length = self._get_text_length()
+        self.input_ranges.clear()
+        if text_length:  # Mark all restored text as manual
+            self.input_ranges.append({
+                'start': 0,
+                'end': text_length,
+                'source': SOURCE_MANUAL,
+                'timestamp': time.time()
+            })
+        self._recount()
 
     def restore_from_current_text(self):
-        """Rebuild metadata from current text (used in redo)."""
+        """Rebuild metadata from current text (used in redo).
+
+        Returns the (start, end) character span whose ranges changed, or None
+        if the ranges are unchanged.
+        """
         if not self.text_widget:
-            return
+            return None
 
-        current_text = self.text_widget.get("1.0", "end-1c")
-        self.input_ranges.clear()
+        self.invalidate_text_cache()
+        text_length = self._get_text_length()
+        old_ranges = self.input_ranges
+        self.input_ranges = []
 
-        if current_text:
+        if text_length:
             self.input_ranges.append({
                 "start": 0,
-                "end": len(current_text),
-                "source": "pasted",  # assume redo inserts pasted text
+                "end": text_length,
+                "source": SOURCE_PASTED,  # assume redo inserts pasted text
                 "timestamp": time.time()
             })
+        self._recount()
+
+        return self._changed_span(old_ranges, self.input_ranges)
+
+    @staticmethod
+    def _changed_span(old_ranges, new_ranges):
+        """Return the (start, end) span covering every range that differs, or None."""
+        def key(r):
+            return r['start'], r['end'], r['source']
+
+        # Skip the ranges both lists share at the front and at the back
+        head = 0
+        limit = min(len(old_ranges), len(new_ranges))
+        while head < limit and key(old_ranges[head]) == key(new_ranges[head]):
+            head += 1
+        tail = 0
+        while tail < limit - head and key(old_ranges[-1 - tail]) == key(new_ranges[-1 - tail]):
+            tail += 1
+
+        changed = old_ranges[head:len(old_ranges) - tail] + new_ranges[head:len(new_ranges) - tail]
+        if not changed:
+            return None
+        return min(r['start'] for r in changed), max(r['end'] for r in changed)
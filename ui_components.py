@@ -3,28 +3,52 @@ UI Components - Additional UI components for the GhostKey editor.
 """
 
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import threading
 import time
+import logging
+from bisect import bisect_right
+from text_tracker import SOURCE_NAMES
+
+log = logging.getLogger(__name__)
+
+# How long the pointer must rest before the hover highlight is computed
+_HOVER_DWELL_MS = 80
+
+# Minimum seconds between forced redraws of a ProgressDialog
+_PROGRESS_REDRAW_INTERVAL = 1 / 30
+
+# Text widget indices for the start and end of the buffer
+_INDEX_START = "1.0"
+_INDEX_END = "end"
+
+# Hover highlight tags and their options, applied to each HoverManager's widget
+_HOVER_TAGS = (
+    ("hover_typed", {"background": "#90EE90", "foreground": "#000000"}),  # Light green
+    ("hover_pasted", {"background": "#FFB6C1", "foreground": "#000000"}),  # Light red
+)
 
 class StatusBar:
     """Status bar component for displaying application status."""
     
     def __init__(self, parent):
         self.frame = ttk.Frame(parent, relief=tk.SUNKEN, borderwidth=1)
-        self.status_var = tk.StringVar()
-        self.status_var.set("Ready")
         
+        # Text is set on the label directly; a StringVar would add a Tcl
+        # variable trace to every update
         self.label = ttk.Label(
             self.frame,
-            textvariable=self.status_var,
+            text="Ready",
             anchor=tk.W,
             padding=(5, 2)
         )
         self.label.pack(fill=tk.X)
         
-        # Timer for clearing temporary messages
+        # Timer for clearing temporary messages, when it fires, and when the
+        # current message is actually due to be cleared (None if never)
         self.clear_timer = None
+        self.clear_timer_due = None
+        self.clear_deadline = None
     
     def pack(self, **kwargs):
         """Pack the status bar frame."""
@@ -32,22 +56,39 @@ class StatusBar:
     
     def set_message(self, message, timeout=3000):
         """Set a status message with optional timeout."""
-        self.status_var.set(message)
+        self.label.configure(text=message)
         
-        # Clear any existing timer
-        if self.clear_timer:
-            self.frame.after_cancel(self.clear_timer)
+        if timeout <= 0:
+            self.clear_deadline = None
+            return
         
-        # Set new timer to clear message
-        if timeout > 0:
-            self.clear_timer = self.frame.after(timeout, lambda: self.status_var.set("Ready"))
+        # Moving the deadline is enough while a timer that fires no later is
+        # pending; it re-arms itself for the remainder when it goes off early
+        self.clear_deadline = time.monotonic() + timeout / 1000
+        if self.clear_timer is not None and self.clear_timer_due <= self.clear_deadline:
+            return
+        if self.clear_timer is not None:
+            self.frame.after_cancel(self.clear_timer)
+        self.clear_timer = self.frame.after(timeout, self.clear_if_due)
+        self.clear_timer_due = self.clear_deadline
+    
+    def clear_if_due(self):
+        """Reset the message to "Ready" once its deadline has passed."""
+        self.clear_timer = None
+        if self.clear_deadline is None:
+            return
+        remaining_ms = int((self.clear_deadline - time.monotonic()) * 1000)
+        if remaining_ms > 0:
+            self.clear_timer = self.frame.after(remaining_ms, self.clear_if_due)
+            self.clear_timer_due = self.clear_deadline
+        else:
+            self.clear_deadline = None
+            self.label.configure(text="Ready")
     
     def set_permanent_message(self, message):
         """Set a permanent status message."""
-        if self.clear_timer:
-            self.frame.after_cancel(self.clear_timer)
-            self.clear_timer = None
-        self.status_var.set(message)
+        self.clear_deadline = None
+        self.label.configure(text=message)
 
 
 class HoverManager:
@@ -58,10 +99,29 @@ class HoverManager:
         self.text_tracker = text_tracker
         self.current_hover_tag = None
         self.hover_active = False
+        # Highlight currently applied as (tag, start_pos, end_pos), and the
+        # tracker ranges version and line table it was computed from
+        self.current_highlight = None
+        self.highlight_version = None
+        self.highlight_line_starts = None
+        
+        # Latest pointer position, handled once the pointer comes to rest
+        self.pending_motion = None
+        self.motion_after_id = None
+        # Tk index last processed, with the ranges version and line table
+        # then current; most pointer moves stay on the same character
+        self.last_index = None
+        
+        # Last range found as (tracker ranges_version, range_info); the pointer
+        # usually stays inside one range for many lookups
+        self.last_found_range = None
+        # Last (position, tracker line table, index) conversion; the pointer's
+        # Tk index stays the same across many pixels
+        self.last_position = None
         
         # Configure highlight tags
-        self.text_widget.tag_configure("hover_typed", background="#90EE90", foreground="#000000")  # Light green
-        self.text_widget.tag_configure("hover_pasted", background="#FFB6C1", foreground="#000000")  # Light red
+        for tag_name, tag_options in _HOVER_TAGS:
+            self.text_widget.tag_configure(tag_name, **tag_options)
         
         # Bind hover events
         self.setup_hover_bindings()
@@ -74,11 +134,39 @@ class HoverManager:
     
     def on_mouse_motion(self, event):
         """Handle mouse motion over text."""
+        # Nothing to highlight in an untracked document, so skip even the index lookup
+        if not self.text_tracker.input_ranges:
+            self.cancel_pending_motion()
+            if self.hover_active:
+                self.clear_hover_highlight()
+            return
+        
+        # Restart the dwell timer on every move, so nothing is computed while
+        # the pointer is sweeping across the text
+        self.pending_motion = (event.x, event.y)
+        self.cancel_pending_motion()
+        self.motion_after_id = self.text_widget.after(_HOVER_DWELL_MS, self.process_mouse_motion)
+    
+    def cancel_pending_motion(self):
+        """Drop a queued motion update so it cannot re-highlight afterwards."""
+        if self.motion_after_id is not None:
+            self.text_widget.after_cancel(self.motion_after_id)
+            self.motion_after_id = None
+    
+    def process_mouse_motion(self):
+        """Update the hover highlight for the latest pointer position."""
+        self.motion_after_id = None
         try:
             # Get mouse position in text widget
-            x, y = event.x, event.y
+            x, y = self.pending_motion
             index_str = self.text_widget.index(f"@{x},{y}")
             
+            tracker = self.text_tracker
+            last = self.last_index
+            if (last and last[0] == index_str and last[1] == tracker.ranges_version and
+                    last[2] is tracker._line_starts):
+                return
+            
             # Get input source at this position
             source = self.text_tracker.get_source_at_position(index_str)
             
@@ -86,77 +174,116 @@ class HoverManager:
                 self.show_hover_highlight(index_str, source)
             else:
                 self.clear_hover_highlight()
+            self.last_index = (index_str, tracker.ranges_version, tracker._line_starts)
                 
         except tk.TclError:
             # Mouse is outside text area
+            self.last_index = None
             self.clear_hover_highlight()
-        except Exception as e:
-            print(f"Error in mouse motion handler: {e}")
+        except ValueError:
+            log.debug("Error in mouse motion handler", exc_info=True)
     
     def on_mouse_leave(self, event):
         """Handle mouse leaving text widget."""
+        self.cancel_pending_motion()
+        self.last_index = None
         self.clear_hover_highlight()
     
     def on_mouse_click(self, event):
         """Handle mouse click to clear hover effects."""
+        self.cancel_pending_motion()
+        self.last_index = None
         self.clear_hover_highlight()
     
     def show_hover_highlight(self, position, source):
         """Show hover highlight for a specific position and source."""
         try:
-            # Clear previous highlight
-            self.clear_hover_highlight()
-            
             # Find the range that contains this position
             hover_range = self.find_hover_range(position, source)
             
-            if hover_range:
-                start_pos = self.text_tracker._index_to_pos(hover_range['start'])
-                end_pos = self.text_tracker._index_to_pos(hover_range['end'])
-                
-                # Apply appropriate tag
-                if source == 'manual':
-                    tag_name = "hover_typed"
-                    self.current_hover_tag = tag_name
-                elif source == 'pasted':
-                    tag_name = "hover_pasted"
-                    self.current_hover_tag = tag_name
-                else:
-                    return
-                
-                # Apply the highlight
-                self.text_widget.tag_add(tag_name, start_pos, end_pos)
-                self.hover_active = True
+            if source == 'manual':
+                tag_name = "hover_typed"
+            elif source == 'pasted':
+                tag_name = "hover_pasted"
+            else:
+                hover_range = None
+            
+            if not hover_range:
+                self.clear_hover_highlight()
+                return
+            
+            tracker = self.text_tracker
+            start_pos, end_pos = tracker.range_to_positions(hover_range)
+            highlight = (tag_name, start_pos, end_pos)
+            
+            # Leave the tags alone while the same range of the same text is hovered
+            if (self.hover_active and highlight == self.current_highlight and
+                    self.highlight_version == tracker.ranges_version and
+                    self.highlight_line_starts is tracker._line_starts):
+                return
+            
+            # Swap the old highlight for the new one back to back
+            self.clear_hover_highlight()
+            self.text_widget.tag_add(*highlight)
+            self.current_hover_tag = tag_name
+            self.current_highlight = highlight
+            self.highlight_version = tracker.ranges_version
+            self.highlight_line_starts = tracker._line_starts
+            self.hover_active = True
                 
-        except Exception as e:
-            print(f"Error showing hover highlight: {e}")
+        except (ValueError, tk.TclError):
+            log.debug("Error showing hover highlight", exc_info=True)
     
     def find_hover_range(self, position, source):
         """Find the complete range around the position with the same source."""
         try:
-            pos_index = self.text_tracker._pos_to_index(position)
+            tracker = self.text_tracker
+            line_starts = tracker._get_line_starts()
+            cached = self.last_position
+            if cached and cached[0] == position and cached[1] is line_starts:
+                pos_index = cached[2]
+            else:
+                pos_index = tracker._pos_to_index(position)
+                self.last_position = (position, line_starts, pos_index)
             
-            # Find the range that contains this position
-            with self.text_tracker.lock:
-                for range_info in self.text_tracker.input_ranges:
-                    if (range_info['start'] <= pos_index < range_info['end'] and 
-                        range_info['source'] == source):
-                        return range_info
+            cached = self.last_found_range
+            if (cached and cached[0] == tracker.ranges_version and
+                    cached[1]['start'] <= pos_index < cached[1]['end']):
+                range_info = cached[1]
+            else:
+                # Ranges are sorted and disjoint, so one bisect finds the candidate
+                i = bisect_right(tracker._range_starts, pos_index) - 1
+                if i < 0 or tracker._range_ends[i] <= pos_index:
+                    return None
+                range_info = tracker.input_ranges[i]
+                self.last_found_range = (tracker.ranges_version, range_info)
             
+            if SOURCE_NAMES[range_info['source']] == source:
+                return range_info
             return None
-        except Exception as e:
-            print(f"Error finding hover range: {e}")
+        except (ValueError, tk.TclError):
+            log.debug("Error finding hover range", exc_info=True)
             return None
     
     def clear_hover_highlight(self):
         """Clear all hover highlights."""
         try:
             if self.current_hover_tag and self.hover_active:
-                self.text_widget.tag_remove(self.current_hover_tag, "1.0", tk.END)
+                if self.highlight_line_starts is self.text_tracker._line_starts:
+                    # The text is as it was when tagged, so the range is exact
+                    self.text_widget.tag_remove(*self.current_highlight)
+                else:
+                    # Edits may have moved or split the tagged run; look up
+                    # where its pieces are now and remove just those
+                    tag_range = self.text_widget.tag_nextrange(self.current_hover_tag, _INDEX_START)
+                    while tag_range:
+                        self.text_widget.tag_remove(self.current_hover_tag, *tag_range)
+                        tag_range = self.text_widget.tag_nextrange(self.current_hover_tag, tag_range[1])
                 self.current_hover_tag = None
+                self.current_highlight = None
                 self.hover_active = False
-        except Exception as e:
-            print(f"Error clearing hover highlight: {e}")
+        except (ValueError, tk.TclError):
+            log.debug("Error clearing hover highlight", exc_info=True)
 
 
 class TooltipManager:
@@ -165,11 +292,13 @@ class TooltipManager:
     def __init__(self, widget):
         self.widget = widget
         self.tooltip_window = None
+        self.tooltip_label = None
+        self.tooltip_visible = False
         self.tooltip_text = ""
         
     def show_tooltip(self, text, x=None, y=None):
         """Show a tooltip with the given text."""
-        if self.tooltip_window or not text:
+        if self.tooltip_visible or not text:
             return
         
         # Get coordinates
@@ -177,30 +306,34 @@ class TooltipManager:
             x = self.widget.winfo_rootx() + 20
             y = self.widget.winfo_rooty() + 20
         
-        # Create tooltip window
-        self.tooltip_window = tw = tk.Toplevel(self.widget)
-        tw.wm_overrideredirect(True)
-        tw.wm_geometry(f"+{x}+{y}")
+        # The window is built on first use and then only moved, shown and hidden
+        if self.tooltip_window is None:
+            self.tooltip_window = tw = tk.Toplevel(self.widget)
+            tw.wm_overrideredirect(True)
+            
+            # Create tooltip label
+            self.tooltip_label = tk.Label(
+                tw,
+                justify=tk.LEFT,
+                background="#ffffe0",
+                relief=tk.SOLID,
+                borderwidth=1,
+                font=("tahoma", "8", "normal"),
+                padx=4,
+                pady=2
+            )
+            self.tooltip_label.pack()
         
-        # Create tooltip label
-        label = tk.Label(
-            tw,
-            text=text,
-            justify=tk.LEFT,
-            background="#ffffe0",
-            relief=tk.SOLID,
-            borderwidth=1,
-            font=("tahoma", "8", "normal"),
-            padx=4,
-            pady=2
-        )
-        label.pack()
+        self.tooltip_label.config(text=text)
+        self.tooltip_window.wm_geometry(f"+{x}+{y}")
+        self.tooltip_window.deiconify()
+        self.tooltip_visible = True
     
     def hide_tooltip(self):
         """Hide the current tooltip."""
-        if self.tooltip_window:
-            self.tooltip_window.destroy()
-            self.tooltip_window = None
+        if self.tooltip_visible:
+            self.tooltip_window.withdraw()
+            self.tooltip_visible = False
 
 
 class ProgressDialog:
@@ -217,27 +350,32 @@ class ProgressDialog:
         self.dialog.transient(parent)
         self.dialog.grab_set()
         
-        # Progress bar
-        self.progress_var = tk.DoubleVar()
+        # Progress bar and status label are updated with configure rather
+        # than through traced Tcl variables
         self.progress_bar = ttk.Progressbar(
             self.dialog,
-            variable=self.progress_var,
             maximum=100
         )
         self.progress_bar.pack(pady=20, padx=20, fill=tk.X)
         
         # Status label
-        self.status_var = tk.StringVar()
-        self.status_var.set("Please wait...")
-        self.status_label = ttk.Label(self.dialog, textvariable=self.status_var)
+        self.status_label = ttk.Label(self.dialog, text="Please wait...")
         self.status_label.pack()
+        
+        self.last_redraw = 0.0
     
     def update_progress(self, value, status=None):
         """Update progress value and status."""
-        self.progress_var.set(value)
+        self.progress_bar.configure(value=value)
         if status:
-            self.status_var.set(status)
-        self.dialog.update()
+            self.status_label.configure(text=status)
+        
+        # Redraw only, without dispatching user events mid-operation, and at
+        # most ~30 times a second; skipped values show at the next redraw
+        now = time.monotonic()
+        if now - self.last_redraw >= _PROGRESS_REDRAW_INTERVAL:
+            self.last_redraw = now
+            self.dialog.update_idletasks()
     
     def close(self):
         """Close the progress dialog."""
@@ -253,6 +391,8 @@ class FindReplaceDialog:
         self.text_widget = text_widget
         self.dialog = None
         self.last_search_index = "1.0"
+        # Tk reports each match's length here, so it never has to be derived
+        self.match_length = tk.IntVar(text_widget)
     
     def show_find_dialog(self):
         """Show the find dialog."""
@@ -279,12 +419,16 @@ class FindReplaceDialog:
         self.dialog.columnconfigure(1, weight=1)
         
         # Bind events
-        self.find_entry.bind('<Return>', lambda e: self.find_next())
+        self.find_entry.bind('<Return>', self.on_find_return)
         self.dialog.protocol("WM_DELETE_WINDOW", self.close_dialog)
         
         # Focus on entry
         self.find_entry.focus()
     
+    def on_find_return(self, event):
+        """Handle Return in the find entry."""
+        self.find_next()
+    
     def find_next(self):
         """Find the next occurrence of the search text."""
         search_text = self.find_entry.get()
@@ -293,21 +437,21 @@ class FindReplaceDialog:
         
         # Search from current position
         start_pos = self.text_widget.index(tk.INSERT)
-        found_pos = self.text_widget.search(search_text, start_pos, tk.END)
+        found_pos = self.text_widget.search(search_text, start_pos, _INDEX_END, count=self.match_length)
         
         if not found_pos:
             # Search from beginning
-            found_pos = self.text_widget.search(search_text, "1.0", start_pos)
+            found_pos = self.text_widget.search(search_text, _INDEX_START, start_pos, count=self.match_length)
         
         if found_pos:
             # Select found text
-            end_pos = f"{found_pos}+{len(search_text)}c"
-            self.text_widget.tag_remove(tk.SEL, "1.0", tk.END)
+            end_pos = f"{found_pos}+{self.match_length.get()}c"
+            self.text_widget.tag_remove(tk.SEL, _INDEX_START, _INDEX_END)
             self.text_widget.tag_add(tk.SEL, found_pos, end_pos)
             self.text_widget.mark_set(tk.INSERT, end_pos)
             self.text_widget.see(found_pos)
         else:
-            tk.messagebox.showinfo("Not Found", f"'{search_text}' not found.")
+            messagebox.showinfo("Not Found", f"'{search_text}' not found.")
     
     def close_dialog(self):
         """Close the find dialog."""